@@ -0,0 +1,85 @@
+"""
+Compares on-disk size and load time of uncompressed and compressed JSON data files.
+
+Loads are timed twice: straight from the page cache, and through a reader throttled
+to a given disk bandwidth, which is where the smaller compressed files win.
+
+Run from the repository root:
+
+    python benchmarks/bench_compression.py --records 100000 --bandwidth 50
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.management.compression import CODECS, compressing_writer, decompressing_reader
+from bench_storage import make_students, best_of
+
+
+# Raw file that sleeps as if its bytes came from a disk of the given bandwidth
+class ThrottledFile(io.RawIOBase):
+    def __init__(self, path, bytes_per_second):
+        self._file = open(path, 'rb', buffering=0)
+        self._bytes_per_second = bytes_per_second
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self._file.readinto(buffer)
+        time.sleep(count / self._bytes_per_second)
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def load(path, compression, bytes_per_second=None):
+    raw_file = ThrottledFile(path, bytes_per_second) if bytes_per_second else open(path, 'rb', buffering=0)
+    with io.BufferedReader(raw_file) as binary_file:
+        stream = decompressing_reader(binary_file, compression) if compression else binary_file
+        return json.load(io.TextIOWrapper(stream, encoding='utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100000, help="number of student records")
+    parser.add_argument('--runs', type=int, default=3, help="timed runs per codec, best is reported")
+    parser.add_argument('--bandwidth', type=float, default=50, help="simulated disk bandwidth in MB/s")
+    args = parser.parse_args()
+
+    students = make_students(args.records)
+    bytes_per_second = args.bandwidth * 1000 * 1000
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for compression in [None, *CODECS]:
+            path = os.path.join(directory, 'students.json' + (CODECS[compression].suffix if compression else ''))
+
+            def save():
+                with open(path, 'wb') as binary_file:
+                    if compression:
+                        with compressing_writer(binary_file, compression, text=True) as json_file:
+                            json.dump(students, json_file, indent=4)
+                    else:
+                        binary_file.write(json.dumps(students, indent=4).encode('utf-8'))
+
+            save_ms = best_of(args.runs, save)
+            assert load(path, compression) == students
+            cached_ms = best_of(args.runs, lambda: load(path, compression))
+            throttled_ms = best_of(args.runs, lambda: load(path, compression, bytes_per_second))
+            results.append((compression or "none", os.path.getsize(path), save_ms, cached_ms, throttled_ms))
+
+    print(f"{args.records} student records, best of {args.runs} runs, disk at {args.bandwidth:g} MB/s")
+    print(f"{'compression':<14}{'size (KiB)':>12}{'save (ms)':>12}{'cached load (ms)':>18}{'disk load (ms)':>16}")
+    for name, size, save_ms, cached_ms, throttled_ms in results:
+        print(f"{name:<14}{size / 1024:>12.1f}{save_ms:>12.1f}{cached_ms:>18.1f}{throttled_ms:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Measures the throughput of the SQLite PRAGMA profiles, against SQLite's defaults.
+
+For every profile a fresh database is created and timed on:
+
+    commits     one INSERT per transaction, as the CRUD functions do
+    bulk        all rows in one transaction with executemany
+    reads       point lookups by primary key
+    mixed       reads in a second thread while commits go on in the first
+
+Run from the repository root:
+
+    python benchmarks/bench_sqlite_profiles.py --commits 2000 --rows 100000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.database.profiles import PROFILES, apply_profile
+
+
+SCHEMA = '''
+    CREATE TABLE Students (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        age INTEGER NOT NULL,
+        email TEXT NOT NULL
+    )
+'''
+
+
+def connect(path, profile):
+    connection = sqlite3.connect(path, timeout=30)
+    if profile is not None:
+        apply_profile(connection, profile)
+    return connection
+
+
+def student(index):
+    return (f"S{index:07d}", f"Student {index}", 18 + index % 10, f"student{index}@school.edu")
+
+
+# Operations per second of a timed function that performs `count` operations
+def rate(count, function):
+    start = time.perf_counter()
+    function()
+    return count / (time.perf_counter() - start)
+
+
+def run(directory, profile, args):
+    path = os.path.join(directory, f"{profile or 'default'}.db")
+    connection = connect(path, profile)
+    connection.execute(SCHEMA)
+    connection.commit()
+
+    def commits():
+        for index in range(args.commits):
+            connection.execute('INSERT INTO Students VALUES (?, ?, ?, ?)', student(index))
+            connection.commit()
+
+    def bulk():
+        connection.executemany('INSERT INTO Students VALUES (?, ?, ?, ?)',
+                               (student(index) for index in range(args.commits, args.commits + args.rows)))
+        connection.commit()
+
+    total = args.commits + args.rows
+
+    def reads():
+        for index in range(0, total, max(1, total // args.reads)):
+            connection.execute('SELECT * FROM Students WHERE id = ?', (student(index)[0],)).fetchone()
+
+    results = {
+        'commits': rate(args.commits, commits),
+        'bulk': rate(args.rows, bulk),
+        'reads': rate(args.reads, reads),
+    }
+
+    # Reads served by a second connection while the first one keeps committing
+    done = threading.Event()
+    read_count = 0
+
+    def reader():
+        nonlocal read_count
+        reader_connection = connect(path, profile)
+        while not done.is_set():
+            reader_connection.execute('SELECT * FROM Students WHERE id = ?', (student(read_count % total)[0],)).fetchone()
+            read_count += 1
+        reader_connection.close()
+
+    thread = threading.Thread(target=reader)
+    start = time.perf_counter()
+    thread.start()
+    for index in range(total, total + args.commits // 4):
+        connection.execute('INSERT INTO Students VALUES (?, ?, ?, ?)', student(index))
+        connection.commit()
+    done.set()
+    thread.join()
+    results['mixed reads'] = read_count / (time.perf_counter() - start)
+    connection.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--commits', type=int, default=2000, help="single-row transactions")
+    parser.add_argument('--rows', type=int, default=100000, help="rows inserted in one transaction")
+    parser.add_argument('--reads', type=int, default=20000, help="point lookups")
+    parser.add_argument('--directory', help="where to create the databases; a temporary directory by default")
+    args = parser.parse_args()
+
+    columns = ['commits', 'bulk', 'reads', 'mixed reads']
+    print(f"Operations per second ({args.commits} commits, {args.rows} bulk rows, {args.reads} reads)")
+    print(f"{'profile':<12}" + ''.join(f"{column:>14}" for column in columns))
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        for profile in [None, *PROFILES]:
+            results = run(directory, profile, args)
+            print(f"{profile or 'default':<12}" + ''.join(f"{results[column]:>14,.0f}" for column in columns))
+
+
+if __name__ == '__main__':
+    main()
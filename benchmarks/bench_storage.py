@@ -0,0 +1,79 @@
+"""
+Compares save time, load time and on-disk size of the JSON and binary data file formats.
+
+Run from the repository root:
+
+    python benchmarks/bench_storage.py --records 40000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.management.binary_format import read_binary_file, write_binary_file
+
+
+# Build a students.json-like dictionary with the given number of records
+def make_students(count):
+    return {
+        f"S{index:06d}": {
+            "type": "student",
+            "name": f"Student {index}",
+            "age": 18 + index % 10,
+            "email": f"student{index}@school.edu",
+            "registered_courses": [f"C{(index + offset) % 200:03d}" for offset in range(4)]
+        }
+        for index in range(count)
+    }
+
+
+# Best wall-clock time of several runs, in milliseconds
+def best_of(runs, function):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=40000, help="number of student records")
+    parser.add_argument('--runs', type=int, default=5, help="timed runs per format, best is reported")
+    args = parser.parse_args()
+
+    students = make_students(args.records)
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'students.json')
+        binary_path = os.path.join(directory, 'students.bin')
+
+        def save_json():
+            with open(json_path, 'w') as json_file:
+                json.dump(students, json_file, indent=4)
+
+        def load_json():
+            with open(json_path, 'r') as json_file:
+                return json.load(json_file)
+
+        def save_binary():
+            with open(binary_path, 'wb') as binary_file:
+                write_binary_file(binary_file, students)
+
+        results = []
+        for name, path, save, load in [("json (indent=4)", json_path, save_json, load_json),
+                                       ("binary", binary_path, save_binary, lambda: read_binary_file(binary_path))]:
+            save_ms = best_of(args.runs, save)
+            results.append((name, os.path.getsize(path), save_ms, best_of(args.runs, load)))
+
+    print(f"{args.records} student records, best of {args.runs} runs")
+    print(f"{'format':<18}{'size (KiB)':>12}{'save (ms)':>12}{'load (ms)':>12}")
+    for name, size, save_ms, load_ms in results:
+        print(f"{name:<18}{size / 1024:>12.1f}{save_ms:>12.1f}{load_ms:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@ from PyQt5.QtWidgets import (
     QLineEdit, QPushButton, QListWidget, QTabWidget
 )
 import sys
-from src.database.database import create_student, read_students, update_student, delete_student, create_instructor, read_instructors, update_instructor, delete_instructor, create_course, read_course, update_course, delete_course
+from src.database.database import create_student, read_students, update_student, delete_student, create_instructor, read_instructors, update_instructor, delete_instructor, create_course, read_course, update_course, delete_course, id_in_use, get_student, get_instructor, get_course, iter_students, iter_instructors, iter_courses, search
 from src.management.school_entities import Student, Instructor, Course
 
 class SchoolManagementSystem(QMainWindow):
@@ -49,21 +49,22 @@ class SchoolManagementSystem(QMainWindow):
         self.populate_listboxes()
 
     def populate_listboxes(self):
+        # Rows are streamed in batches rather than read into one list
         # Populate students listbox
         self.student_listbox.clear()
-        students = read_students()
+        students = iter_students()
         for student in students:
             self.student_listbox.addItem(f"{student[1]} (ID: {student[0]})")  # student[1]: name, student[0]: id
 
         # Populate instructors listbox
         self.instructor_listbox.clear()
-        instructors = read_instructors()
+        instructors = iter_instructors()
         for instructor in instructors:
             self.instructor_listbox.addItem(f"{instructor[1]} (ID: {instructor[0]})")  # instructor[1]: name, instructor[0]: id
 
         # Populate courses listbox
         self.course_listbox.clear()
-        courses = read_course()
+        courses = iter_courses()
         for course in courses:
             self.course_listbox.addItem(f"{course[1]} (ID: {course[0]})")  # course[1]: name, course[0]: id
 
@@ -113,6 +114,10 @@ class SchoolManagementSystem(QMainWindow):
             self.message_label.setText("Error: All fields must be filled out.")
             return
 
+        if id_in_use('people', student_id):
+            self.message_label.setText("Error: Student ID already exists.")
+            return
+
         # Create a Student object
         student = Student(name, int(age), email, student_id)
 
@@ -155,8 +160,7 @@ class SchoolManagementSystem(QMainWindow):
             return
 
         student_id = selected.text().split(" (ID: ")[-1][:-1]
-        students = read_students()
-        student_details = next((student for student in students if student[0] == student_id), None)
+        student_details = get_student(student_id)
 
         if student_details:
             self.student_name_entry.setText(student_details[1])
@@ -237,6 +241,10 @@ class SchoolManagementSystem(QMainWindow):
             self.message_label.setText("Error: All fields must be filled out.")
             return
 
+        if id_in_use('people', instructor_id):
+            self.message_label.setText("Error: Instructor ID already exists.")
+            return
+
         # Create an Instructor object
         instructor = Instructor(name, int(age), email, instructor_id)
 
@@ -279,8 +287,7 @@ class SchoolManagementSystem(QMainWindow):
             return
 
         instructor_id = selected.text().split(" (ID: ")[-1][:-1]
-        instructors = read_instructors()
-        instructor_details = next((instructor for instructor in instructors if instructor[0] == instructor_id), None)
+        instructor_details = get_instructor(instructor_id)
 
         if instructor_details:
             self.instructor_name_entry.setText(instructor_details[1])
@@ -357,6 +364,10 @@ class SchoolManagementSystem(QMainWindow):
             self.message_label.setText("Error: All fields must be filled out.")
             return
 
+        if id_in_use('courses', course_id):
+            self.message_label.setText("Error: Course ID already exists.")
+            return
+
         # Create a Course object
         course = Course(course_id, name, instructor_id)
 
@@ -398,8 +409,7 @@ class SchoolManagementSystem(QMainWindow):
             return
 
         course_id = selected.text().split(" (ID: ")[-1][:-1]
-        courses = read_course()
-        course_details = next((course for course in courses if course[0] == course_id), None)
+        course_details = get_course(course_id)
 
         if course_details:
             self.course_name_entry.setText(course_details[1])
@@ -443,7 +453,7 @@ class SchoolManagementSystem(QMainWindow):
         self.courses_search_entry = QLineEdit()
 
         layout.addWidget(QLabel("Search Students"))
-        layout.addWidget(QLabel("Search by ID:"))
+        layout.addWidget(QLabel("Search by ID, name or email:"))
         layout.addWidget(self.student_search_entry)
 
         search_student_btn = QPushButton("Search Student")
@@ -451,7 +461,7 @@ class SchoolManagementSystem(QMainWindow):
         layout.addWidget(search_student_btn)
 
         layout.addWidget(QLabel("Search Instructors"))
-        layout.addWidget(QLabel("Search by ID:"))
+        layout.addWidget(QLabel("Search by ID, name or email:"))
         layout.addWidget(self.instructor_search_entry)
 
         search_instructor_btn = QPushButton("Search Instructor")
@@ -459,7 +469,7 @@ class SchoolManagementSystem(QMainWindow):
         layout.addWidget(search_instructor_btn)
 
         layout.addWidget(QLabel("Search Courses"))
-        layout.addWidget(QLabel("Search by ID:"))
+        layout.addWidget(QLabel("Search by ID or name:"))
         layout.addWidget(self.courses_search_entry)
 
         search_course_btn = QPushButton("Search Course")
@@ -478,40 +488,46 @@ class SchoolManagementSystem(QMainWindow):
         elif self.courses_search_entry.text():
             search_term = self.courses_search_entry.text()
         else:
-            self.message_label.setText("Please enter an ID.")
+            self.message_label.setText("Please enter an ID, a name or an email.")
             return
 
+        # Look the ID up by primary key instead of scanning the whole table
         if type == "student":
-            data = read_students()
+            item = get_student(search_term)
         elif type == "instructor":
-            data = read_instructors()
+            item = get_instructor(search_term)
         elif type == "course":
-            data = read_course()
+            item = get_course(search_term)
 
         self.result_listbox.clear()
-        match_found = False
-
-        for item in data:
-            if search_term == item[0]:  # item[0] is the ID
-                match_found = True
-                # Format the information in a readable way
-                if type == "student":
-                    self.result_listbox.addItem(f"Name: {item[1]}")
-                    self.result_listbox.addItem(f"ID: {item[0]}")
-                    self.result_listbox.addItem(f"Age: {item[2]}")
-                    self.result_listbox.addItem(f"Email: {item[3]}")
-                elif type == "instructor":
-                    self.result_listbox.addItem(f"Name: {item[1]}")
-                    self.result_listbox.addItem(f"ID: {item[0]}")
-                    self.result_listbox.addItem(f"Age: {item[2]}")
-                    self.result_listbox.addItem(f"Email: {item[3]}")
-                elif type == "course":
-                    self.result_listbox.addItem(f"Course Name: {item[1]}")
-                    self.result_listbox.addItem(f"ID: {item[0]}")
-                    self.result_listbox.addItem(f"Instructor: {item[2]}")
+        match_found = item is not None
+
+        if match_found:
+            # Format the information in a readable way
+            if type == "student":
+                self.result_listbox.addItem(f"Name: {item[1]}")
+                self.result_listbox.addItem(f"ID: {item[0]}")
+                self.result_listbox.addItem(f"Age: {item[2]}")
+                self.result_listbox.addItem(f"Email: {item[3]}")
+            elif type == "instructor":
+                self.result_listbox.addItem(f"Name: {item[1]}")
+                self.result_listbox.addItem(f"ID: {item[0]}")
+                self.result_listbox.addItem(f"Age: {item[2]}")
+                self.result_listbox.addItem(f"Email: {item[3]}")
+            elif type == "course":
+                self.result_listbox.addItem(f"Course Name: {item[1]}")
+                self.result_listbox.addItem(f"ID: {item[0]}")
+                self.result_listbox.addItem(f"Instructor: {item[2]}")
 
         if not match_found:
-            self.message_label.setText(f"No matching {type} found.")
+            # No record has this ID; list those whose ID, name or email match it instead
+            matches = search(search_term, kinds=[type])
+            for match in matches:
+                self.result_listbox.addItem(f"{match.name} (ID: {match.id})")
+            if matches:
+                self.message_label.setText(f"{len(matches)} {type}(s) matching '{search_term}'.")
+            else:
+                self.message_label.setText(f"No matching {type} found.")
         else:
             self.message_label.setText(f"Matching {type} found.")
 
@@ -46,31 +46,24 @@ class SchoolManagementSystem(QMainWindow):
         self.message_label = QLabel("")
         main_layout.addWidget(self.message_label)
 
-        # Load initial data and populate listboxes
-        self.load_data()
+        # Populate listboxes from the JSON files
         self.populate_listboxes()
 
-    def load_data(self):
-        self.students = load_data_from_json('students.json')
-        self.instructors = load_data_from_json('instructors.json')
-        self.courses = load_data_from_json('courses.json')
-
     def populate_listboxes(self):
-        # Populate students listbox
+        # Populate students listbox from the names in the snapshots
         self.student_listbox.clear()
-        self.load_data()
-        for id, student_details in self.students.items():
-            self.student_listbox.addItem(f"{student_details['name']} (ID: {id})")
+        for student in iter_entities('students.json'):
+            self.student_listbox.addItem(f"{student.name} (ID: {student.id})")
 
         # Populate instructors listbox
         self.instructor_listbox.clear()
-        for id, instructor_details in self.instructors.items():
-            self.instructor_listbox.addItem(f"{instructor_details['name']} (ID: {id})")
+        for instructor in iter_entities('instructors.json'):
+            self.instructor_listbox.addItem(f"{instructor.name} (ID: {instructor.id})")
 
         # Populate courses listbox
         self.course_listbox.clear()
-        for id, course_details in self.courses.items():
-            self.course_listbox.addItem(f"{course_details['name']} (ID: {id})")
+        for course in iter_entities('courses.json'):
+            self.course_listbox.addItem(f"{course.name} (ID: {course.id})")
 
     def init_students_tab(self):
         layout = QVBoxLayout()
@@ -163,7 +156,7 @@ class SchoolManagementSystem(QMainWindow):
             return
 
         student_id = selected.text().split(" (ID: ")[-1][:-1]
-        student_details = self.students[student_id]
+        student_details = get_record('students.json', student_id)
 
         # Fill the entry fields with the current student's details for editing
         self.student_name_entry.setText(student_details['name'])
@@ -193,7 +186,6 @@ class SchoolManagementSystem(QMainWindow):
         student = Student(name=name, age=int(age), email=email, id=student_id)
 
         save_data_to_json(student, 'students.json')
-        self.load_data()
         self.populate_listboxes()
         self.clear_student_entries()
         self.message_label.setText(f"Student {student_id} updated successfully!")
@@ -288,7 +280,7 @@ class SchoolManagementSystem(QMainWindow):
             return
 
         instructor_id = selected.text().split(" (ID: ")[-1][:-1]
-        instructor_details = self.instructors[instructor_id]
+        instructor_details = get_record('instructors.json', instructor_id)
 
         # Fill the entry fields with the current instructor's details for editing
         self.instructor_name_entry.setText(instructor_details['name'])
@@ -318,7 +310,6 @@ class SchoolManagementSystem(QMainWindow):
         instructor = Instructor(name=name, age=int(age), email=email, id=instructor_id)
 
         save_data_to_json(instructor, 'instructors.json')
-        self.load_data()
         self.populate_listboxes()
         self.clear_instructor_entries()
         self.message_label.setText(f"Instructor {instructor_id} updated successfully!")
@@ -408,7 +399,7 @@ class SchoolManagementSystem(QMainWindow):
             return
 
         course_id = selected.text().split(" (ID: ")[-1][:-1]
-        course_details = self.courses[course_id]
+        course_details = get_record('courses.json', course_id)
 
         # Fill the entry fields with the current course's details for editing
         self.course_name_entry.setText(course_details['name'])
@@ -436,7 +427,6 @@ class SchoolManagementSystem(QMainWindow):
         course = Course(name=name, id=course_id, instructor=instructor)
 
         save_data_to_json(course, 'courses.json')
-        self.load_data()
         self.populate_listboxes()
         self.clear_course_entries()
         self.message_label.setText(f"Course {course_id} updated successfully!")
@@ -451,7 +441,7 @@ class SchoolManagementSystem(QMainWindow):
         self.courses_search_entry = QLineEdit()
 
         layout.addWidget(QLabel("Search Students"))
-        layout.addWidget(QLabel("Search by ID:"))
+        layout.addWidget(QLabel("Search by ID, email or name:"))
         layout.addWidget(self.student_search_entry)
 
         search_student_btn = QPushButton("Search Student")
@@ -459,7 +449,7 @@ class SchoolManagementSystem(QMainWindow):
         layout.addWidget(search_student_btn)
 
         layout.addWidget(QLabel("Search Instructors"))
-        layout.addWidget(QLabel("Search by ID:"))
+        layout.addWidget(QLabel("Search by ID, email or name:"))
         layout.addWidget(self.instructor_search_entry)
 
         search_instructor_btn = QPushButton("Search Instructor")
@@ -467,7 +457,7 @@ class SchoolManagementSystem(QMainWindow):
         layout.addWidget(search_instructor_btn)
 
         layout.addWidget(QLabel("Search Courses"))
-        layout.addWidget(QLabel("Search by ID:"))
+        layout.addWidget(QLabel("Search by ID or name:"))
         layout.addWidget(self.courses_search_entry)
 
         search_course_btn = QPushButton("Search Course")
@@ -479,48 +469,54 @@ class SchoolManagementSystem(QMainWindow):
 
     def perform_search(self, type):
         if self.student_search_entry.text():
-            search_term = self.student_search_entry.text().lower()
+            search_term = self.student_search_entry.text().strip()
         elif self.instructor_search_entry.text():
-            search_term = self.instructor_search_entry.text().lower()
+            search_term = self.instructor_search_entry.text().strip()
         elif self.courses_search_entry.text():
-            search_term = self.courses_search_entry.text().lower()
+            search_term = self.courses_search_entry.text().strip()
         else:
             self.message_label.setText("Please enter an ID.")
             return
 
         if type == "student":
-            data = load_data_from_json('students.json')
+            filename = 'students.json'
         elif type == "instructor":
-            data = load_data_from_json('instructors.json')
+            filename = 'instructors.json'
         elif type == "course":
-            data = load_data_from_json('courses.json')
+            filename = 'courses.json'
 
         self.result_listbox.clear()
-        match_found = False
-
-        for item_id, info in data.items():
-            if search_term == item_id:
-                match_found = True
-                # Format the information in a readable way
-                if type == "student":
-                    self.result_listbox.addItem(f"Name: {info['name']}")
-                    self.result_listbox.addItem(f"ID: {item_id}")
-                    self.result_listbox.addItem(f"Age: {info['age']}")
-                    self.result_listbox.addItem(f"Email: {info['email']}")
-                    self.result_listbox.addItem(f"Registered Courses: {', '.join(info['registered_courses']) if info['registered_courses'] else 'None'}")
-                elif type == "instructor":
-                    self.result_listbox.addItem(f"Name: {info['name']}")
-                    self.result_listbox.addItem(f"ID: {item_id}")
-                    self.result_listbox.addItem(f"Age: {info['age']}")
-                    self.result_listbox.addItem(f"Email: {info['email']}")
-                    self.result_listbox.addItem(f"Assigned Courses: {', '.join(info['assigned_courses']) if info['assigned_courses'] else 'None'}")
-                elif type == "course":
-                    self.result_listbox.addItem(f"Course Name: {info['name']}")
-                    self.result_listbox.addItem(f"ID: {item_id}")
-                    self.result_listbox.addItem(f"Instructor: {info['instructor']}")
-                    self.result_listbox.addItem(f"Students: {', '.join(info['students']) if info['students'] else 'None'}")
-
-        if not match_found:
+
+        # Match the ID first, then the email, then the name, using the indexes
+        if contains_record(filename, search_term):
+            matches = [search_term]
+        elif type != "course" and find_by_email(filename, search_term) is not None:
+            matches = [find_by_email(filename, search_term)]
+        else:
+            matches = find_by_name(filename, search_term)
+
+        for item_id in matches:
+            info = get_entity(filename, item_id)
+            # Format the information in a readable way
+            if type == "student":
+                self.result_listbox.addItem(f"Name: {info.name}")
+                self.result_listbox.addItem(f"ID: {item_id}")
+                self.result_listbox.addItem(f"Age: {info.age}")
+                self.result_listbox.addItem(f"Email: {info.email}")
+                self.result_listbox.addItem(f"Registered Courses: {', '.join(info.registered_courses) or 'None'}")
+            elif type == "instructor":
+                self.result_listbox.addItem(f"Name: {info.name}")
+                self.result_listbox.addItem(f"ID: {item_id}")
+                self.result_listbox.addItem(f"Age: {info.age}")
+                self.result_listbox.addItem(f"Email: {info.email}")
+                self.result_listbox.addItem(f"Assigned Courses: {', '.join(courses_of_instructor(item_id)) or 'None'}")
+            elif type == "course":
+                self.result_listbox.addItem(f"Course Name: {info.name}")
+                self.result_listbox.addItem(f"ID: {item_id}")
+                self.result_listbox.addItem(f"Instructor: {info.instructor}")
+                self.result_listbox.addItem(f"Students: {', '.join(students_in_course(item_id)) or 'None'}")
+
+        if not matches:
             self.message_label.setText(f"No matching {type} found.")
         else:
             self.message_label.setText(f"Matching {type} found.")
@@ -0,0 +1,188 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# -------------------------------------------
+# SQLite connection pool
+# -------------------------------------------
+#
+# Opening a connection means opening the file, reading its schema and setting
+# the connection up, which costs far more than the single statement most CRUD
+# functions run. The pool keeps connections open and lends one to a thread for
+# the length of a ``with connection()`` block; when the outermost block ends the
+# connection goes back to the pool for the next thread that needs one.
+
+
+class PoolTimeoutError(TimeoutError):
+    """
+    Raised when no connection becomes available within the pool's timeout.
+    """
+
+
+class PoolClosedError(RuntimeError):
+    """
+    Raised when a connection is requested from a pool that was shut down.
+    """
+
+
+class _Idle:
+    # A connection waiting in the pool, and when it was last known to work
+    def __init__(self, connection):
+        self.connection = connection
+        self.checked_at = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Pool of SQLite connections lent to threads one ``with`` block at a time.
+
+    A thread borrows a connection when it enters ``connection()`` and gives it back
+    when the outermost block ends, so idle threads hold none. At most ``max_size``
+    connections are open at once; when they are all lent out, the caller waits up
+    to ``timeout`` seconds before PoolTimeoutError is raised.
+
+    A connection that has been idle for ``check_interval`` seconds is checked with
+    ``SELECT 1`` before it is lent again, and replaced if it fails.
+
+    Parameters:
+        database (str): Path of the database file.
+        max_size (int): Maximum number of open connections.
+        timeout (float): Seconds to wait for a free connection.
+        check_interval (float): Idle seconds after which a connection is checked.
+        busy_timeout (float): Seconds SQLite waits for a lock held by another connection.
+        on_connect (callable): Called with every new connection, e.g. to set PRAGMAs.
+    """
+
+    def __init__(self, database, max_size=8, timeout=5.0, check_interval=30.0, busy_timeout=5.0,
+                 on_connect=None):
+        if max_size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.database = database
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.busy_timeout = busy_timeout
+        self.on_connect = on_connect
+        self._idle = []      # _Idle connections, the most recently returned last
+        self._open = 0       # Connections open, idle or lent out
+        self._local = threading.local()  # The calling thread's borrowed connection and block depth
+        self._condition = threading.Condition()
+        self._closed = False
+        self.opened = 0   # Connections opened over the life of the pool
+
+    def _connect(self):
+        # Connections move between threads, one at a time
+        connection = sqlite3.connect(self.database, timeout=self.busy_timeout, check_same_thread=False)
+        if self.on_connect is not None:
+            self.on_connect(connection)
+        self.opened += 1
+        return connection
+
+    def _is_healthy(self, connection):
+        try:
+            connection.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _close_quietly(self, connection):
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+    def _borrow(self):
+        # An idle connection, or a new one while the pool is not full
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolClosedError("The connection pool is closed")
+                if self._idle:
+                    idle = self._idle.pop()
+                    break
+                if self._open < self.max_size:
+                    self._open += 1
+                    idle = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(f"No database connection free after {self.timeout} seconds")
+                self._condition.wait(remaining)
+        try:
+            if idle is None:
+                return self._connect()
+            if time.monotonic() - idle.checked_at > self.check_interval and not self._is_healthy(idle.connection):
+                self._close_quietly(idle.connection)
+                return self._connect()
+            return idle.connection
+        except BaseException:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+    def _give_back(self, connection):
+        with self._condition:
+            if self._closed:
+                self._open -= 1
+                self._close_quietly(connection)
+            else:
+                self._idle.append(_Idle(connection))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """
+        Lends the calling thread a connection for the duration of a ``with`` block.
+
+        The outermost block commits when it ends, or rolls back if it raises, and
+        returns the connection to the pool. Nested blocks in the same thread share
+        the connection and its transaction.
+        """
+        local = self._local
+        if getattr(local, 'depth', 0):
+            local.depth += 1
+            try:
+                yield local.connection
+            finally:
+                local.depth -= 1
+            return
+        connection = self._borrow()
+        local.connection, local.depth = connection, 1
+        try:
+            yield connection
+        except BaseException:
+            try:
+                connection.rollback()
+            finally:
+                local.connection, local.depth = None, 0
+                self._give_back(connection)
+            raise
+        try:
+            connection.commit()
+        finally:
+            local.connection, local.depth = None, 0
+            self._give_back(connection)
+
+    def size(self):
+        with self._condition:
+            return self._open
+
+    def idle(self):
+        with self._condition:
+            return len(self._idle)
+
+    def close(self):
+        """
+        Closes every idle connection; connections lent out are closed when they are
+        given back. Later requests raise PoolClosedError.
+        """
+        with self._condition:
+            self._closed = True
+            for idle in self._idle:
+                self._close_quietly(idle.connection)
+            self._open -= len(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
@@ -1,6 +1,24 @@
+import atexit
+import functools
+import hashlib
+import json
+import re
+from collections import namedtuple
+from itertools import islice
 import sqlite3
 import os
 import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from management.id_registry import IdRegistry
+from management.validation import check_record, validate_records
+from database.connection_pool import ConnectionPool, PoolTimeoutError, PoolClosedError
+from database.profiles import PROFILES, apply_profile, profile_from_environment
+from database.query_cache import CacheStats, QueryCache
+from database.migrations import SEARCH_TABLES, MigrationError, migrate, schema_version
+
+# PRAGMA profile applied to every connection, see profiles.py
+DB_PROFILE = profile_from_environment()
 
 # Function to create the database and tables
 def create_database():
@@ -14,219 +32,856 @@ def create_database():
 
     # Connect to the SQLite database (or create it if it doesn't exist)
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Create Students table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS Students (
-            id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            age INTEGER NOT NULL,
-            email TEXT NOT NULL
-        )
-    ''')
-
-    # Create Instructors table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS Instructors (
-            id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            age INTEGER NOT NULL,
-            email TEXT NOT NULL
-        )
-    ''')
-
-    # Create Courses table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS Courses (
-            id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            instructor_id TEXT,
-            FOREIGN KEY (instructor_id) REFERENCES Instructors (id)
-        )
-    ''')
-
-    # Create Registrations table (Join table)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS Registrations (
-            student_id TEXT,
-            course_id TEXT,
-            PRIMARY KEY (student_id, course_id),
-            FOREIGN KEY (student_id) REFERENCES Students (id),
-            FOREIGN KEY (course_id) REFERENCES Courses (id)
-        )
-    ''')
-
-    # Commit changes and close the connection
-    conn.commit()
+    apply_profile(conn, DB_PROFILE)
+
+    # Create the tables, or upgrade an existing database to the current schema
+    migrate(conn)
     conn.close()
 
-# Call the function to create the database and tables
+# Call the function to create or upgrade the database and tables
 create_database()
 
+DB_PATH = os.path.join('src/database', 'school_management.db')
+
+# Open a standalone connection to the SQLite database, which the caller closes
+def connect_db():
+    conn = sqlite3.connect(DB_PATH)
+    apply_profile(conn, DB_PROFILE)
+    return conn
+
 # -------------------------------------------
-# CRUD operations for students
+# Connection pool
 # -------------------------------------------
 
-# Connect to the SQLite database
-def connect_db():
-    db_path = os.path.join('src/database', 'school_management.db')
-    return sqlite3.connect(db_path)
+def _create_pool(profile, **options):
+    return ConnectionPool(DB_PATH, on_connect=lambda conn: apply_profile(conn, profile), **options)
+
+# Every CRUD function below borrows its thread's connection from this pool
+# instead of connecting on each call
+_pool = _create_pool(DB_PROFILE)
+
+def configure_pool(profile=None, **options):
+    """
+    Replaces the connection pool, closing the connections of the current one.
+
+    Parameters:
+        profile (str): PRAGMA profile of the new connections: 'durable', 'balanced'
+            or 'bulk-load'; keeps the current one if omitted.
+        **options: Keyword arguments forwarded to ``ConnectionPool``, e.g. ``max_size``.
+    """
+    global _pool, DB_PROFILE
+    if profile is not None:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown database profile '{profile}'; expected one of {', '.join(PROFILES)}")
+        DB_PROFILE = profile
+    _pool.close()
+    _pool = _create_pool(DB_PROFILE, **options)
+    return _pool
+
+def connection():
+    """
+    Lends the calling thread its pooled connection for a ``with`` block, committing
+    when the block ends and rolling back if it raises.
+    """
+    return _pool.connection()
+
+def close_pool():
+    _pool.close()
+
+atexit.register(close_pool)
+
+# -------------------------------------------
+# ID registry
+# -------------------------------------------
+
+# Tables sharing each namespace of the registry; students and instructors share
+# one, so a person's ID is unique across both tables
+REGISTRY_TABLES = {
+    'people': ['Students', 'Instructors'],
+    'courses': ['Courses'],
+}
+
+_registry = IdRegistry(os.path.join('src/database', 'registry'))
+_registry_signatures = {}  # namespace -> signature of the database it matches
+
+def _database_signature():
+    # Size and modification time of the database and its write-ahead log. An empty
+    # log holds no changes: it is what the first connection creates where there was
+    # none, so it counts as missing.
+    digest = hashlib.blake2b(digest_size=16)
+    for path in (DB_PATH, DB_PATH + '-wal'):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            stat = None
+        if stat is None or (path != DB_PATH and not stat.st_size):
+            digest.update(f'{path}:-;'.encode('utf-8'))
+        else:
+            digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns};'.encode('utf-8'))
+    return digest.digest()
+
+def _read_ids(namespace):
+    with connection() as conn:
+        cursor = conn.cursor()
+        ids = []
+        for table in REGISTRY_TABLES[namespace]:
+            cursor.execute(f'SELECT id FROM {table}')
+            ids.extend(row[0] for row in cursor.fetchall())
+    return ids
+
+def _check_registry():
+    # Forget the namespaces of the registry that no longer match the database,
+    # which another process has written since; they are read again when needed
+    signature = _database_signature()
+    for namespace in _registry.namespaces():
+        if signature != _registry_signatures.get(namespace):
+            _registry.forget(namespace)
+    return signature
+
+# Check whether an ID is taken, mostly without querying the database
+def id_in_use(namespace, entry_id):
+    signature = _check_registry()
+    if not _registry.is_open(namespace):
+        _registry.open(namespace, signature, lambda: _read_ids(namespace))
+        _registry_signatures[namespace] = signature
+    return _registry.contains(namespace, entry_id)
+
+# Called after every write made through this module, which the registry has seen.
+# The registry is taken to match the database after the write by @_writes.
+def _registry_written(namespace=None, added=None, removed=None):
+    _registry_written_many(namespace,
+                           [] if added is None else [added],
+                           [] if removed is None else [removed])
+
+def _registry_written_many(namespace=None, added=(), removed=()):
+    if added:
+        _registry.add_many(namespace, added)
+    if removed and _registry.is_open(namespace):
+        # An ID stays taken while another table of the namespace still uses it
+        with connection() as conn:
+            cursor = conn.cursor()
+            for entry_id in removed:
+                if not any(cursor.execute(f'SELECT 1 FROM {table} WHERE id = ?', (entry_id,)).fetchone()
+                           for table in REGISTRY_TABLES[namespace]):
+                    _registry.discard(namespace, entry_id)
+
+# Save the registry on exit, unless the database was changed by someone else
+def _save_registry():
+    signature = _database_signature()
+    current = []
+    for namespace in _registry.namespaces():
+        if signature == _registry_signatures.get(namespace):
+            current.append(namespace)
+        else:
+            _registry.forget(namespace)
+    # Closing the last connection checkpoints the log into the database and
+    # removes it, so the files are signed as the next run will find them
+    close_pool()
+    signature = _database_signature()
+    for namespace in current:
+        _registry.save(namespace, signature)
+
+atexit.register(_save_registry)
+
+# -------------------------------------------
+# Query cache
+# -------------------------------------------
+#
+# Results of the read functions marked @_cached are kept by query_cache.py until
+# a function marked @_writes changes one of the tables they were read from.
+# Changes made by other processes are noticed, without querying SQLite, by the
+# size and modification time of the database files, and empty the whole cache.
+
+_query_cache = QueryCache()
+_cache_signature = None  # Signature of the database the cached results match
+_cache_lock = threading.Lock()
+
+def _check_cache():
+    # Empty the cache if the database files changed since it was last checked
+    global _cache_signature
+    signature = _database_signature()
+    with _cache_lock:
+        if signature != _cache_signature:
+            _query_cache.clear()
+            _cache_signature = signature
+
+# Marks where the keyword arguments start in a cache key
+_KEYWORDS = object()
+
+def _copy_result(value):
+    # Cached results are shared, so every caller gets its own lists and dicts.
+    # Rows are tuples of plain values and are returned as they are.
+    if isinstance(value, list):
+        return [_copy_result(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy_result(item) for key, item in value.items()}
+    if isinstance(value, tuple) and hasattr(value, '_fields'):
+        return type(value)(*map(_copy_result, value))
+    return value
+
+def _cached(*tables):
+    # Cache the results of a read function by its arguments
+    def decorator(function):
+        @functools.wraps(function)
+        def cached(*args, **kwargs):
+            _check_cache()
+            key = (function.__name__,) + args
+            if kwargs:
+                key += (_KEYWORDS,) + tuple(sorted(kwargs.items()))
+            return _copy_result(_query_cache.get_or_load(key, tables, lambda: function(*args, **kwargs)))
+        return cached
+    return decorator
+
+def _data_version(conn):
+    # Changes whenever a connection other than this one commits
+    return conn.execute('PRAGMA data_version').fetchone()[0]
+
+def _writes(*tables):
+    # Drop the cached results of the tables a write function changes. The write
+    # runs in one transaction that takes the write lock up front, so no other
+    # process commits between the cache and registry checks and the write. The
+    # files as they are after the commit are taken as matching the cache and the
+    # ID registry only if no other connection committed in the meantime;
+    # otherwise the next read empties the whole cache and rereads the IDs.
+    def decorator(function):
+        @functools.wraps(function)
+        def writing(*args, **kwargs):
+            global _cache_signature
+            signature = None
+            try:
+                with connection() as conn:
+                    if conn.in_transaction:
+                        # Part of the caller's transaction, which commits later
+                        return function(*args, **kwargs)
+                    conn.execute('BEGIN IMMEDIATE')
+                    _check_cache()
+                    _check_registry()
+                    result = function(*args, **kwargs)
+                    version = _data_version(conn)
+                    conn.commit()
+                    written = _database_signature()
+                    if _data_version(conn) == version:
+                        signature = written
+                return result
+            finally:
+                _query_cache.invalidate(*tables)
+                if signature is not None:
+                    with _cache_lock:
+                        _cache_signature = signature
+                    for namespace in _registry.namespaces():
+                        _registry_signatures[namespace] = signature
+        return writing
+    return decorator
+
+def configure_query_cache(max_entries):
+    """
+    Sets how many query results are cached; 0 turns the cache off.
+    """
+    _query_cache.resize(max_entries)
+
+def query_cache_stats():
+    """
+    Returns the hits, misses, evictions and invalidations of the query cache so
+    far, with its current and maximum number of entries, as a CacheStats tuple.
+    """
+    return _query_cache.stats()
+
+def clear_query_cache():
+    _query_cache.clear()
+
+# -------------------------------------------
+# CRUD operations for students
+# -------------------------------------------
 
 # Create a new student
+@_writes('Students')
 def create_student(student):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO Students (id, name, age, email) VALUES (?, ?, ?, ?)
-    ''', (student.id, student.name, student.age, student.email))
-    conn.commit()
-    conn.close()
+    check_record(student)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO Students (id, name, age, email) VALUES (?, ?, ?, ?)
+        ''', (student.id, student.name, student.age, student.email))
+    _registry_written('people', added=student.id)
 
 # Read all students
+@_cached('Students')
 def read_students():
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM Students')
-    students = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM Students')
+        students = cursor.fetchall()
+    return students
+
+# Read one student by ID, or None if there is no such student
+@_cached('Students')
+def get_student(student_id):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM Students WHERE id = ?', (student_id,))
+        student = cursor.fetchone()
+    return student
+
+# Parameters bound per IN (...) query, well below SQLite's limit on variables
+LOOKUP_CHUNK_SIZE = 500
+
+# Read many students by ID, returning a dictionary of the ones that exist
+def get_students(student_ids):
+    students = {}
+    with connection() as conn:
+        cursor = conn.cursor()
+        for chunk in _chunks(dict.fromkeys(student_ids), LOOKUP_CHUNK_SIZE):
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'SELECT * FROM Students WHERE id IN ({placeholders})', chunk)
+            for student in cursor:
+                students[student[0]] = student
     return students
 
 # Update a student
+@_writes('Students')
 def update_student(student):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE Students SET name = ?, age = ?, email = ? WHERE id = ?
-    ''', (student.name, student.age, student.email, student.id))
-    conn.commit()
-    conn.close()
+    check_record(student)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE Students SET name = ?, age = ?, email = ? WHERE id = ?
+        ''', (student.name, student.age, student.email, student.id))
+    _registry_written()
 
 # Delete a student
+@_writes('Students')
 def delete_student(student_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM Students WHERE id = ?', (student_id,))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM Students WHERE id = ?', (student_id,))
+    _registry_written('people', removed=student_id)
 
 # -------------------------------------------
 # CRUD operations for instructors
 # -------------------------------------------
 
 # Create a new instructor
+@_writes('Instructors')
 def create_instructor(instructor):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO Instructors (id, name, age, email) VALUES (?, ?, ?, ?)
-    ''', (instructor.id, instructor.name, instructor.age, instructor.email))
-    conn.commit()
-    conn.close()
+    check_record(instructor)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO Instructors (id, name, age, email) VALUES (?, ?, ?, ?)
+        ''', (instructor.id, instructor.name, instructor.age, instructor.email))
+    _registry_written('people', added=instructor.id)
 
 # Read all instructors
+@_cached('Instructors')
 def read_instructors():
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM Instructors')
-    instructors = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM Instructors')
+        instructors = cursor.fetchall()
     return instructors
 
+# Read one instructor by ID, or None if there is no such instructor
+@_cached('Instructors')
+def get_instructor(instructor_id):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM Instructors WHERE id = ?', (instructor_id,))
+        instructor = cursor.fetchone()
+    return instructor
+
 # Update an instructor
+@_writes('Instructors')
 def update_instructor(instructor):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE Instructors SET name = ?, age = ?, email = ? WHERE id = ?
-    ''', (instructor.name, instructor.age, instructor.email, instructor.id))
-    conn.commit()
-    conn.close()
+    check_record(instructor)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE Instructors SET name = ?, age = ?, email = ? WHERE id = ?
+        ''', (instructor.name, instructor.age, instructor.email, instructor.id))
+    _registry_written()
 
 # Delete an instructor
+@_writes('Instructors')
 def delete_instructor(instructor_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM Instructors WHERE id = ?', (instructor_id,))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM Instructors WHERE id = ?', (instructor_id,))
+    _registry_written('people', removed=instructor_id)
 
 # -------------------------------------------
 # CRUD operations for courses
 # -------------------------------------------
 
 # Create a new instructor
+@_writes('Courses')
 def create_course(course):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO Courses (id, name, instructor_id) VALUES (?, ?, ?)
-    ''', (course.id, course.name, course.instructor))
-    conn.commit()
-    conn.close()
+    check_record(course)
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO Courses (id, name, instructor_id) VALUES (?, ?, ?)
+        ''', (course.id, course.name, course.instructor))
+    _registry_written('courses', added=course.id)
 
 # Read all instructors
+@_cached('Courses')
 def read_course():
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM Courses')
-    courses = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM Courses')
+        courses = cursor.fetchall()
     return courses
 
+# Read one course by ID, or None if there is no such course
+@_cached('Courses')
+def get_course(course_id):
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM Courses WHERE id = ?', (course_id,))
+        course = cursor.fetchone()
+    return course
+
 # Update a student
+@_writes('Courses')
 def update_course(course):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE Courses SET name = ?, instructor = ? WHERE id = ?
-    ''', (course.name, course.instructr, course.id))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE Courses SET name = ?, instructor_id = ? WHERE id = ?
+        ''', (course.name, course.instructor, course.id))
+    _registry_written()
 
 # Delete a student
+@_writes('Courses')
 def delete_course(course_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM Coruses WHERE id = ?', (course_id,))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM Courses WHERE id = ?', (course_id,))
+    _registry_written('courses', removed=course_id)
     
+@_writes('Registrations')
 def register_student_to_course(student_id, course_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO Registrations (student_id, course_id) VALUES (?, ?)
-    ''', (student_id, course_id))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO Registrations (student_id, course_id) VALUES (?, ?)
+        ''', (student_id, course_id))
+    _registry_written()
+
+# Students, instructors and courses with their relationship lists, keyed by ID
+DatabaseSnapshot = namedtuple('DatabaseSnapshot', ['students', 'instructors', 'courses'])
+
+@_cached('Students', 'Instructors', 'Courses', 'Registrations')
+def load_snapshot():
+    """
+    Loads every student, instructor and course together with their relationships.
+
+    Four set-based queries are run, however many rows there are, in one read
+    transaction so the result is consistent. Rows are streamed from the cursors
+    and grouped in Python.
 
+    Returns:
+        DatabaseSnapshot: ``(students, instructors, courses)`` dictionaries keyed by
+        ID, shaped like::
+
+            students[id]    = {'name', 'age', 'email', 'registered_courses'}
+            instructors[id] = {'name', 'age', 'email', 'assigned_courses'}
+            courses[id]     = {'name', 'instructor_id', 'students'}
+    """
+    with connection() as conn:
+        if not conn.in_transaction:
+            conn.execute('BEGIN')
+        students = {id: {'name': name, 'age': age, 'email': email, 'registered_courses': []}
+                    for id, name, age, email in conn.execute('SELECT id, name, age, email FROM Students')}
+        instructors = {id: {'name': name, 'age': age, 'email': email, 'assigned_courses': []}
+                       for id, name, age, email in conn.execute('SELECT id, name, age, email FROM Instructors')}
+        courses = {}
+        for id, name, instructor_id in conn.execute('SELECT id, name, instructor_id FROM Courses'):
+            courses[id] = {'name': name, 'instructor_id': instructor_id, 'students': []}
+            if instructor_id in instructors:
+                instructors[instructor_id]['assigned_courses'].append(id)
+        # One pass over the join table fills both sides of the relationship
+        for student_id, course_id in conn.execute(
+                'SELECT student_id, course_id FROM Registrations ORDER BY student_id, course_id'):
+            if student_id in students:
+                students[student_id]['registered_courses'].append(course_id)
+            if course_id in courses:
+                courses[course_id]['students'].append(student_id)
+    return DatabaseSnapshot(students, instructors, courses)
+
+@_cached('Registrations')
 def get_student_courses(student_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT course_id FROM Registrations WHERE student_id = ?
-    ''', (student_id,))
-    courses = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT course_id FROM Registrations WHERE student_id = ?
+        ''', (student_id,))
+        courses = cursor.fetchall()
     return [course[0] for course in courses]
 
+@_cached('Registrations')
 def get_course_students(course_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT student_id FROM Registrations WHERE course_id = ?
-    ''', (course_id,))
-    students = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT student_id FROM Registrations WHERE course_id = ?
+        ''', (course_id,))
+        students = cursor.fetchall()
     return [student[0] for student in students]
 
+@_cached('Courses')
 def get_instructor_courses(instructor_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT id FROM Courses WHERE instructor_id = ?
-    ''', (instructor_id,))
-    courses = cursor.fetchall()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT id FROM Courses WHERE instructor_id = ?
+        ''', (instructor_id,))
+        courses = cursor.fetchall()
     return [course[0] for course in courses]
+
+# -------------------------------------------
+# Paging and streaming
+# -------------------------------------------
+#
+# Pages are found by keyset: each one starts after the key of the previous page's
+# last row, so reading page 1000 costs as much as page 1 and no OFFSET rows are
+# skipped. Ordering by name breaks ties on the ID so every row has a unique key.
+
+# Columns each table is ordered by, for every supported ordering
+PAGE_ORDERINGS = {
+    'id': ('id',),
+    'name': ('name', 'id'),
+}
+
+# Rows read per query when streaming a whole table
+STREAM_BATCH_SIZE = 1000
+
+def _read_page(table, after_id, after_name, limit, order_by):
+    if order_by not in PAGE_ORDERINGS:
+        raise ValueError(f"Unknown ordering '{order_by}'; expected one of {', '.join(PAGE_ORDERINGS)}")
+    if limit < 1:
+        raise ValueError("Page limit must be at least 1")
+    columns = PAGE_ORDERINGS[order_by]
+    where, params = '', []
+    with connection() as conn:
+        cursor = conn.cursor()
+        if after_id is not None and order_by == 'name':
+            if after_name is None:
+                cursor.execute(f'SELECT name FROM {table} WHERE id = ?', (after_id,))
+                row = cursor.fetchone()
+                if row is None:
+                    raise ValueError(f"ID {after_id} not found; pass the name of the last row as after_name")
+                after_name = row[0]
+            # Rows named like the last one but with a later ID, then rows with later names
+            where, params = 'WHERE (name, id) > (?, ?)', [after_name, after_id]
+        elif after_id is not None:
+            where, params = 'WHERE id > ?', [after_id]
+        cursor.execute(f'SELECT * FROM {table} {where} ORDER BY {", ".join(columns)} LIMIT ?', params + [limit])
+        rows = cursor.fetchall()
+    return rows
+
+def _stream(table, order_by, batch_size):
+    after_id = after_name = None
+    while True:
+        rows = _read_page(table, after_id, after_name, batch_size, order_by)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after_id, after_name = rows[-1][0], rows[-1][1]
+
+def page_students(after_id=None, limit=100, order_by='id', after_name=None):
+    """
+    Reads one page of students, starting after a given student.
+
+    Parameters:
+        after_id (str): ID of the last student of the previous page; None for the first page.
+        limit (int): Maximum number of students on the page.
+        order_by (str): 'id' or 'name'.
+        after_name (str): Name of that last student when ordering by name; looked up if omitted.
+
+    Returns:
+        list: Up to ``limit`` rows ``(id, name, age, email)``. A shorter page is the last one.
+    """
+    return _read_page('Students', after_id, after_name, limit, order_by)
+
+def page_instructors(after_id=None, limit=100, order_by='id', after_name=None):
+    """
+    Reads one page of instructors, like ``page_students``.
+    """
+    return _read_page('Instructors', after_id, after_name, limit, order_by)
+
+def page_courses(after_id=None, limit=100, order_by='id', after_name=None):
+    """
+    Reads one page of courses, like ``page_students``. Rows are ``(id, name, instructor_id)``.
+    """
+    return _read_page('Courses', after_id, after_name, limit, order_by)
+
+def iter_students(order_by='id', batch_size=STREAM_BATCH_SIZE):
+    """
+    Yields every student, reading ``batch_size`` rows per query.
+
+    Only one batch is held in memory at a time, and no transaction is kept open
+    between batches, so writes made while iterating are not blocked. Rows added
+    or removed during the iteration may or may not be seen.
+
+    Parameters:
+        order_by (str): 'id' or 'name'.
+        batch_size (int): Rows read per query.
+    """
+    return _stream('Students', order_by, batch_size)
+
+def iter_instructors(order_by='id', batch_size=STREAM_BATCH_SIZE):
+    """
+    Yields every instructor, like ``iter_students``.
+    """
+    return _stream('Instructors', order_by, batch_size)
+
+def iter_courses(order_by='id', batch_size=STREAM_BATCH_SIZE):
+    """
+    Yields every course, like ``iter_students``.
+    """
+    return _stream('Courses', order_by, batch_size)
+
+# -------------------------------------------
+# Full-text search
+# -------------------------------------------
+#
+# Students, instructors and courses are found by any word of their ID, name or
+# email, or the start of one. With FTS5 the SearchIndex table kept by the
+# triggers of migrations.py answers the query, ranked by bm25 with names weighted
+# above emails; without it every table is scanned with LIKE.
+
+# kind: 'student', 'instructor' or 'course'; email is None for courses
+SearchResult = namedtuple('SearchResult', ['kind', 'id', 'name', 'email'])
+
+# Weights of the kind, id, name and email columns in the bm25 rank
+SEARCH_WEIGHTS = (0.0, 2.0, 10.0, 1.0)
+
+# Queries matching more rows than this are not ranked, since bm25 scores every match
+SEARCH_RANK_LIMIT = 10000
+
+_search_index = None  # Whether the database has SearchIndex, checked on first search
+
+def _has_search_index(conn):
+    global _search_index
+    if _search_index is None:
+        cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'SearchIndex'")
+        _search_index = cursor.fetchone() is not None
+    return _search_index
+
+def _search_terms(query):
+    # Words of the query; punctuation only separates them, as in the index
+    return re.findall(r'\w+', query)
+
+def _search_index_query(conn, terms, kinds, limit):
+    # Every word must match the start of a word in one of the given columns
+    def match(columns):
+        expression = '{%s} : (%s)' % (columns, ' '.join(f'"{term}"*' for term in terms))
+        if set(kinds) != set(SEARCH_TABLES):
+            expression = f"kind : ({' OR '.join(kinds)}) AND {expression}"
+        return expression
+
+    def query(expression, order, count):
+        cursor = conn.execute(f'SELECT kind, id, name, email FROM SearchIndex WHERE SearchIndex MATCH ? {order} LIMIT ?',
+                              (expression, count))
+        return [SearchResult(*row) for row in cursor]
+
+    everything = match('id name email')
+    cursor = conn.execute('SELECT count(*) FROM SearchIndex WHERE SearchIndex MATCH ?', (everything,))
+    if cursor.fetchone()[0] <= SEARCH_RANK_LIMIT:
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        return query(everything, f'ORDER BY bm25(SearchIndex, {weights})', limit)
+    # Too many matches to rank quickly: name matches first, then the rest
+    results = query(match('name'), '', limit)
+    if len(results) < limit:
+        found = {(result.kind, result.id) for result in results}
+        results.extend(result for result in query(everything, '', limit + len(results))
+                       if (result.kind, result.id) not in found)
+    return results[:limit]
+
+def _search_like(conn, terms, kinds, limit):
+    # Every word must appear somewhere in some column. An exact ID comes first,
+    # then names starting with the first word, then the rest by name
+    patterns = ['%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%' for term in terms]
+    first = terms[0].lower()
+    results = []
+    for kind in kinds:
+        table, has_email = SEARCH_TABLES[kind]
+        columns = ['id', 'name'] + (['email'] if has_email else [])
+        term_match = '(' + ' OR '.join(f"{column} LIKE ? ESCAPE '\\'" for column in columns) + ')'
+        where = ' AND '.join([term_match] * len(patterns))
+        params = [pattern for pattern in patterns for _ in columns]
+        cursor = conn.execute(f"""
+            SELECT id, name, {'email' if has_email else 'NULL'} FROM {table} WHERE {where}
+            ORDER BY lower(id) = ? DESC, name LIKE ? ESCAPE '\\' DESC, name, id LIMIT ?
+        """, params + [first, patterns[0][1:], limit])
+        results.extend(SearchResult(kind, *row) for row in cursor)
+    results.sort(key=lambda result: (result.id.lower() != first, not result.name.lower().startswith(first),
+                                     result.name, result.id))
+    return results[:limit]
+
+def search(query, kinds=None, limit=20):
+    """
+    Finds students, instructors and courses by words of their ID, name or email.
+
+    Each word of the query matches the start of a word, so "jo sm" finds "John
+    Smith" and "jo" finds "jo.doe@school.edu". All words must match.
+
+    Parameters:
+        query (str): The text typed by the user.
+        kinds (iterable): Any of 'student', 'instructor' and 'course'; all of them if omitted.
+        limit (int): Maximum number of results.
+
+    Returns:
+        list: SearchResult ``(kind, id, name, email)`` tuples, best matches first.
+    """
+    kinds = tuple(SEARCH_TABLES) if kinds is None else tuple(kinds)
+    for kind in kinds:
+        if kind not in SEARCH_TABLES:
+            raise ValueError(f"Unknown kind '{kind}'; expected one of {', '.join(SEARCH_TABLES)}")
+    terms = _search_terms(query)
+    if not terms or not kinds or limit < 1:
+        return []
+    with connection() as conn:
+        if _has_search_index(conn):
+            return _search_index_query(conn, terms, kinds, limit)
+        return _search_like(conn, terms, kinds, limit)
+
+# -------------------------------------------
+# Bulk operations
+# -------------------------------------------
+
+# Rows validated and written at a time, so huge inputs stream through
+BULK_CHUNK_SIZE = 5000
+
+def _chunks(iterable, size=None):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size or BULK_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+def _check_chunk(chunk, start):
+    # Raise ValueError on the first invalid record of a chunk, by its position in the input
+    for error in validate_records(chunk):
+        raise ValueError(f"Record {start + error.index} (ID {error.id}): {error.message}")
+
+_json_each = None  # Whether SQLite has the JSON1 functions, checked on first bulk write
+
+def _by_json_array(conn):
+    # With the search index, each chunk is written by a single statement reading
+    # its rows from a JSON array: executemany would run one statement per row, and
+    # the index triggers make FTS5 flush its pending terms at the end of every
+    # statement. Without the index, or without JSON1, executemany is used.
+    global _json_each
+    if not _has_search_index(conn):
+        return False
+    if _json_each is None:
+        try:
+            conn.execute("SELECT value FROM json_each('[]')").fetchall()
+            _json_each = True
+        except sqlite3.OperationalError:
+            _json_each = False
+    return _json_each
+
+def _insert_many(table, columns, objs, row_of):
+    # Insert every object in one transaction: all rows are stored or none are
+    ids = []
+    with connection() as conn:
+        if _by_json_array(conn):
+            values = ', '.join(f"json_extract(value, '$[{index}]')" for index in range(len(columns)))
+            sql = f'INSERT INTO {table} ({", ".join(columns)}) SELECT {values} FROM json_each(?)'
+            write = lambda cursor, rows: cursor.execute(sql, (json.dumps(rows),))
+        else:
+            sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+            write = lambda cursor, rows: cursor.executemany(sql, rows)
+        cursor = conn.cursor()
+        for chunk in _chunks(objs):
+            _check_chunk(chunk, len(ids))
+            write(cursor, [row_of(obj) for obj in chunk])
+            ids.extend(obj.id for obj in chunk)
+    return ids
+
+def _delete_many(table, entry_ids):
+    deleted = 0
+    removed = []
+    with connection() as conn:
+        by_json_array = _by_json_array(conn)
+        cursor = conn.cursor()
+        for chunk in _chunks(entry_ids):
+            if by_json_array:
+                cursor.execute(f'DELETE FROM {table} WHERE id IN (SELECT value FROM json_each(?))',
+                               (json.dumps(chunk),))
+            else:
+                cursor.executemany(f'DELETE FROM {table} WHERE id = ?', ((entry_id,) for entry_id in chunk))
+            deleted += cursor.rowcount
+            removed.extend(chunk)
+    return deleted, removed
+
+# Create many students in one transaction, returning how many were created
+@_writes('Students')
+def create_students(students):
+    ids = _insert_many('Students', ('id', 'name', 'age', 'email'), students,
+                       lambda student: (student.id, student.name, student.age, student.email))
+    _registry_written_many('people', added=ids)
+    return len(ids)
+
+# Delete many students in one transaction, returning how many existed
+@_writes('Students')
+def delete_students(student_ids):
+    deleted, removed = _delete_many('Students', student_ids)
+    _registry_written_many('people', removed=removed)
+    return deleted
+
+@_writes('Instructors')
+def create_instructors(instructors):
+    ids = _insert_many('Instructors', ('id', 'name', 'age', 'email'), instructors,
+                       lambda instructor: (instructor.id, instructor.name, instructor.age, instructor.email))
+    _registry_written_many('people', added=ids)
+    return len(ids)
+
+@_writes('Instructors')
+def delete_instructors(instructor_ids):
+    deleted, removed = _delete_many('Instructors', instructor_ids)
+    _registry_written_many('people', removed=removed)
+    return deleted
+
+@_writes('Courses')
+def create_courses(courses):
+    ids = _insert_many('Courses', ('id', 'name', 'instructor_id'), courses,
+                       lambda course: (course.id, course.name, course.instructor))
+    _registry_written_many('courses', added=ids)
+    return len(ids)
+
+@_writes('Courses')
+def delete_courses(course_ids):
+    deleted, removed = _delete_many('Courses', course_ids)
+    _registry_written_many('courses', removed=removed)
+    return deleted
+
+# Register many students to one course in one transaction
+@_writes('Registrations')
+def register_students_to_course(course_id, student_ids):
+    registered = 0
+    with connection() as conn:
+        cursor = conn.cursor()
+        for chunk in _chunks(student_ids):
+            cursor.executemany('INSERT INTO Registrations (student_id, course_id) VALUES (?, ?)',
+                               ((student_id, course_id) for student_id in chunk))
+            registered += len(chunk)
+    _registry_written()
+    return registered
+
+# Make one instructor the instructor of many courses in one transaction
+@_writes('Courses')
+def assign_instructor_to_courses(instructor_id, course_ids):
+    assigned = 0
+    with connection() as conn:
+        cursor = conn.cursor()
+        for chunk in _chunks(course_ids):
+            cursor.executemany('UPDATE Courses SET instructor_id = ? WHERE id = ?',
+                               ((instructor_id, course_id) for course_id in chunk))
+            assigned += cursor.rowcount
+    _registry_written()
+    return assigned
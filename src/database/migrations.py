@@ -0,0 +1,201 @@
+import sqlite3
+from collections import namedtuple
+
+# -------------------------------------------
+# Schema migrations
+# -------------------------------------------
+#
+# The schema version of a database is kept in its header, in PRAGMA user_version.
+# Each migration below brings the schema from the previous version to its own,
+# and runs in its own transaction together with the version bump, so a database
+# is never left between two versions. A new schema change is added as a new
+# migration at the end of the list; shipped migrations are never edited.
+
+# version: schema version after the migration, description: what it does,
+# statements: SQL run in order, or callables taking the connection
+Migration = namedtuple('Migration', ['version', 'description', 'statements'])
+
+# -------------------------------------------
+# Full-text search index
+# -------------------------------------------
+#
+# SearchIndex is an FTS5 table holding the ID, name and email of every student,
+# instructor and course, kept up to date by triggers on the three tables. Its
+# rowids come from SearchKeys, whose INTEGER PRIMARY KEY survives VACUUM unlike
+# the implicit rowids of the entity tables. Builds of SQLite without FTS5 get no
+# index, and search falls back to LIKE queries.
+
+# Kind stored in the index -> table, and whether the table has an email column
+SEARCH_TABLES = {
+    'student': ('Students', True),
+    'instructor': ('Instructors', True),
+    'course': ('Courses', False),
+}
+
+def _search_triggers(kind, table, has_email):
+    key = f"(SELECT key FROM SearchKeys WHERE kind = '{kind}' AND entry_id = {{row}}.id)"
+    email = 'new.email' if has_email else 'NULL'
+    unindex = f"""
+            DELETE FROM SearchIndex WHERE rowid = {key.format(row='old')};"""
+    index = f"""
+            INSERT INTO SearchIndex (rowid, kind, id, name, email)
+                VALUES ({key.format(row='new')}, '{kind}', new.id, new.name, {email});"""
+    return [
+        f"""CREATE TRIGGER {table.lower()}_search_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO SearchKeys (kind, entry_id) VALUES ('{kind}', new.id);{index}
+        END""",
+        f"""CREATE TRIGGER {table.lower()}_search_delete AFTER DELETE ON {table} BEGIN{unindex}
+            DELETE FROM SearchKeys WHERE kind = '{kind}' AND entry_id = old.id;
+        END""",
+        f"""CREATE TRIGGER {table.lower()}_search_update AFTER UPDATE ON {table} BEGIN{unindex}
+            UPDATE SearchKeys SET entry_id = new.id WHERE kind = '{kind}' AND entry_id = old.id;{index}
+        END""",
+    ]
+
+def create_search_index(conn):
+    """
+    Creates the full-text index and its triggers, and indexes the existing rows.
+
+    Does nothing when this build of SQLite has no FTS5.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to the database, inside a transaction.
+    """
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE SearchIndex USING fts5(
+                kind, id, name, email,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2'
+            )
+        """)
+    except sqlite3.OperationalError as error:
+        if 'fts5' not in str(error):
+            raise
+        return
+    conn.execute("""
+        CREATE TABLE SearchKeys (
+            key INTEGER PRIMARY KEY,
+            kind TEXT NOT NULL,
+            entry_id TEXT NOT NULL,
+            UNIQUE (kind, entry_id)
+        )
+    """)
+    for kind, (table, has_email) in SEARCH_TABLES.items():
+        conn.execute(f"INSERT INTO SearchKeys (kind, entry_id) SELECT '{kind}', id FROM {table}")
+        conn.execute(f"""
+            INSERT INTO SearchIndex (rowid, kind, id, name, email)
+            SELECT SearchKeys.key, '{kind}', {table}.id, {table}.name, {f'{table}.email' if has_email else 'NULL'}
+            FROM {table} JOIN SearchKeys ON SearchKeys.kind = '{kind}' AND SearchKeys.entry_id = {table}.id
+        """)
+        for trigger in _search_triggers(kind, table, has_email):
+            conn.execute(trigger)
+
+
+MIGRATIONS = [
+    Migration(1, "Create the Students, Instructors, Courses and Registrations tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS Students (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            email TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Instructors (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            email TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS Courses (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            instructor_id TEXT,
+            FOREIGN KEY (instructor_id) REFERENCES Instructors (id)
+        )
+        ''',
+        # Join table
+        '''
+        CREATE TABLE IF NOT EXISTS Registrations (
+            student_id TEXT,
+            course_id TEXT,
+            PRIMARY KEY (student_id, course_id),
+            FOREIGN KEY (student_id) REFERENCES Students (id),
+            FOREIGN KEY (course_id) REFERENCES Courses (id)
+        )
+        ''',
+    ]),
+    # The primary key only serves lookups by student; get_course_students scanned the table
+    Migration(2, "Index registrations by course", [
+        'CREATE INDEX IF NOT EXISTS idx_registrations_course ON Registrations (course_id)',
+    ]),
+    Migration(3, "Index courses by instructor", [
+        'CREATE INDEX IF NOT EXISTS idx_courses_instructor ON Courses (instructor_id)',
+    ]),
+    # Keyset pages ordered by name seek on (name, id) instead of sorting the table
+    Migration(4, "Index students, instructors and courses by name", [
+        'CREATE INDEX IF NOT EXISTS idx_students_name ON Students (name, id)',
+        'CREATE INDEX IF NOT EXISTS idx_instructors_name ON Instructors (name, id)',
+        'CREATE INDEX IF NOT EXISTS idx_courses_name ON Courses (name, id)',
+    ]),
+    Migration(5, "Add the full-text search index", [create_search_index]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+class MigrationError(RuntimeError):
+    """
+    Raised when a database is newer than the migrations known to this code.
+    """
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, target=None):
+    """
+    Upgrades a database in place to the latest schema version, or to ``target``.
+
+    Every pending migration runs in its own write transaction, which first checks
+    the version again, so several processes may upgrade the same file at once.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to the database.
+        target (int): Version to stop at; the latest if omitted.
+
+    Returns:
+        list: The versions that were applied, in order.
+    """
+    target = LATEST_VERSION if target is None else target
+    version = schema_version(conn)
+    if version > LATEST_VERSION:
+        raise MigrationError(f"Database schema version {version} is newer than this code ({LATEST_VERSION})")
+    conn.commit()
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version or migration.version > target:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Another connection may have applied it while this one waited for the lock
+            if schema_version(conn) >= migration.version:
+                conn.rollback()
+                continue
+            for statement in migration.statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {migration.version}')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(migration.version)
+    return applied
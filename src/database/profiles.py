@@ -0,0 +1,74 @@
+import os
+
+# -------------------------------------------
+# SQLite performance profiles
+# -------------------------------------------
+#
+# Each profile is the set of PRAGMAs run on every new connection. All of them
+# use the write-ahead log, so readers keep reading while a write is in progress
+# and a commit needs a single fsync of the log instead of two, one for the
+# rollback journal and one for the database.
+#
+#   durable     every commit is on disk before it returns (synchronous=FULL)
+#   balanced    commits survive a crash of the application; the last ones may be
+#               lost if the machine loses power (synchronous=NORMAL)
+#   bulk-load   for imports that can be redone: nothing is fsynced, and caches
+#               are large (synchronous=OFF)
+#
+# busy_timeout comes first, so switching the journal mode waits for other
+# connections instead of failing.
+
+PROFILES = {
+    'durable': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -8000,           # KiB when negative: 8 MiB
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+    'balanced': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+    'bulk-load': {
+        'busy_timeout': 30000,
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    },
+}
+
+# Profile used when none is configured; a deployment can pick another one by
+# setting SCHOOL_DB_PROFILE
+DEFAULT_PROFILE = 'balanced'
+
+
+def profile_from_environment():
+    """
+    Returns the profile named by the SCHOOL_DB_PROFILE environment variable, or the default.
+    """
+    name = os.environ.get('SCHOOL_DB_PROFILE', DEFAULT_PROFILE)
+    if name not in PROFILES:
+        raise ValueError(f"Unknown database profile '{name}'; expected one of {', '.join(PROFILES)}")
+    return name
+
+
+def apply_profile(connection, profile):
+    """
+    Runs the PRAGMAs of a profile on a connection.
+
+    Parameters:
+        connection (sqlite3.Connection): The connection to configure.
+        profile (str): 'durable', 'balanced' or 'bulk-load'.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}'; expected one of {', '.join(PROFILES)}")
+    for pragma, value in PROFILES[profile].items():
+        connection.execute(f'PRAGMA {pragma} = {value}')
@@ -0,0 +1,109 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+# -------------------------------------------
+# Query result cache
+# -------------------------------------------
+#
+# Results of read queries are kept in memory, keyed by the query and its
+# parameters, together with the tables they were read from. A write to a table
+# drops every result read from it; the least recently used results are dropped
+# when the cache is full. Cached results are shared between callers and must not
+# be modified.
+
+# hits/misses: lookups answered from the cache or by running the query,
+# evictions: results dropped to stay within max_entries, invalidations: results
+# dropped because a table they were read from was written
+CacheStats = namedtuple('CacheStats', ['hits', 'misses', 'evictions', 'invalidations', 'entries', 'max_entries'])
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of query results, invalidated by table.
+
+    Every table has a version that is bumped when it is invalidated. A result is
+    only stored if the versions of its tables did not change while it was being
+    read, and the cache was not cleared, so a write that lands during a read
+    cannot leave the old rows behind.
+
+    Parameters:
+        max_entries (int): Maximum number of results kept; 0 disables the cache.
+    """
+
+    def __init__(self, max_entries=256):
+        if max_entries < 0:
+            raise ValueError("Cache size cannot be negative")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (tables, result)
+        self._versions = {}            # table -> number of invalidations
+        self._epoch = 0                # number of clear() calls
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _token(self, tables):
+        return (self._epoch,) + tuple(self._versions.get(table, 0) for table in tables)
+
+    def get_or_load(self, key, tables, load):
+        """
+        Returns the cached result for ``key``, or calls ``load()`` and caches what it returns.
+
+        Parameters:
+            key (tuple): The query and its parameters.
+            tables (tuple): The tables the query reads.
+            load (callable): Runs the query.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][1]
+            self.misses += 1
+            token = self._token(tables)
+        result = load()
+        with self._lock:
+            if self.max_entries and token == self._token(tables):
+                self._entries[key] = (tables, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def invalidate(self, *tables):
+        """
+        Drops every result read from any of the given tables.
+        """
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale = [key for key, (read, _) in self._entries.items() if not set(read).isdisjoint(tables)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """
+        Drops every result, as after a change made outside this process.
+        """
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def resize(self, max_entries):
+        with self._lock:
+            if max_entries < 0:
+                raise ValueError("Cache size cannot be negative")
+            self.max_entries = max_entries
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, self.invalidations,
+                              len(self._entries), self.max_entries)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = self.invalidations = 0
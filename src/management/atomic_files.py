@@ -0,0 +1,50 @@
+import os
+import stat
+import tempfile
+
+# -------------------------------------------
+# Atomic file replacement
+# -------------------------------------------
+#
+# Data files, snapshots and registry files are replaced by writing the new
+# version to a temporary file in the same directory and renaming it over the old
+# one, so a crash leaves either the old or the new version, never a mix.
+
+# The process's umask, read once: reading it means setting it, which is not thread-safe
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Permissions for a new version of a file: those of the file it replaces, or what
+# open() would give a new file. mkstemp creates files readable by their owner only.
+def replacement_mode(file_path):
+    try:
+        return stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+# Replace a file in one step, so a crash leaves either the old or the new version
+def atomic_write(file_path, write, binary=False):
+    directory = os.path.dirname(file_path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file_path), suffix='.tmp')
+    try:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, replacement_mode(file_path))
+        with os.fdopen(fd, 'wb' if binary else 'w') as temp_file:
+            write(temp_file)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    fsync_directory(directory)
+
+# Persist a rename by syncing the directory entry (not possible on Windows)
+def fsync_directory(directory):
+    if os.name != 'posix':
+        return
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
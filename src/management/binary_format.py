@@ -0,0 +1,401 @@
+import json
+import struct
+import sys
+from array import array
+from itertools import accumulate, chain, repeat
+
+# -------------------------------------------
+# Compact binary encoding for the data files
+# -------------------------------------------
+#
+# Layout (all integers little-endian):
+#
+#   header        magic 'SMSB', version (u16), flags (u16),
+#                 string count (u32), shape count (u32), record count (u32)
+#   string table  byte length of the UTF-8 blob (u32), then the blob of all
+#                 strings separated by NUL characters; if a string contains NUL,
+#                 the character length of every string (u32 each) comes first,
+#                 the strings are stored back to back and flags is 0
+#   shape table   for each shape: field count (u16), then the string index of
+#                 each field name (u32) and its type tag (u8)
+#   runs          consecutive records with the same shape, up to RUN_SIZE of
+#                 them: record count (u32), shape index (u16), the string index
+#                 of every record ID (u32 each), then one column per field
+#
+# Strings, including repeated values such as course IDs, are stored once in the
+# table and referenced by index, and records with the same fields and value types
+# share one shape. A column holds the field's value for every record of the run:
+# integers (i64), floats (f64), booleans (u8), string and JSON values as string
+# indexes (u32), nothing for null, and string lists as their lengths (u32 each)
+# followed by the string indexes of all their items. A whole run is decoded a
+# column at a time, without a Python loop per record, and records keep their
+# order in the file.
+#
+# Version 1 files, with one length-prefixed record after another, can still be
+# read.
+
+MAGIC = b'SMSB'
+VERSION = 2
+
+_HEADER = struct.Struct('<4sHHIII')
+_LENGTH = struct.Struct('<I')
+_RECORD_HEAD = struct.Struct('<IIH')  # Version 1: length, ID string index, shape index
+_RUN_HEAD = struct.Struct('<IH')      # Record count, shape index
+_SHAPE_COUNT = struct.Struct('<H')
+_SHAPE_FIELD = struct.Struct('<IB')
+
+# Records per run; iterating a file holds one decoded run at a time
+RUN_SIZE = 4096
+
+# Header flags: the string table is NUL-separated, so it is cut with str.split
+_NUL_SEPARATED = 1
+
+# Value type tags
+_NULL, _INT, _FLOAT, _STRING, _BOOL, _STRING_LIST, _JSON = range(7)
+
+# Version 1: struct code of each tag's slot; None is stored as a zero byte, lists as their length
+_CODES = {_NULL: '?', _INT: 'q', _FLOAT: 'd', _STRING: 'I', _BOOL: '?', _STRING_LIST: 'I', _JSON: 'I'}
+
+# array type code of each tag's column; null columns are empty
+_COLUMN_CODES = {_INT: 'q', _FLOAT: 'd', _STRING: 'I', _BOOL: 'B', _STRING_LIST: 'I', _JSON: 'I'}
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings = []
+        self.indexes = {}
+
+    def index(self, value):
+        index = self.indexes.get(value)
+        if index is None:
+            index = self.indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def _to_bytes(values, code='I'):
+    values = array(code, values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(data, code='I'):
+    values = array(code)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _tag_of(value):
+    if value is None:
+        return _NULL
+    if isinstance(value, bool):
+        return _BOOL
+    if isinstance(value, int) and -2 ** 63 <= value < 2 ** 63:
+        return _INT
+    if isinstance(value, float):
+        return _FLOAT
+    if isinstance(value, str):
+        return _STRING
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return _STRING_LIST
+    # Anything else (nested objects, mixed lists) is kept as a JSON string
+    return _JSON
+
+
+def _record_builder(field_count):
+    # A function building the records of a run from its columns with a dict display,
+    # which is quicker than dict(zip(names, row)) per record. Only the field count
+    # goes into the generated source; the names are passed in as arguments.
+    if field_count not in _BUILDERS:
+        keys = ', '.join(f'k{slot}' for slot in range(field_count))
+        values = ', '.join(f'v{slot}' for slot in range(field_count))
+        display = ', '.join(f'k{slot}: v{slot}' for slot in range(field_count))
+        source = (f"def build(names, columns):\n"
+                  f"    {keys}, = names\n"
+                  f"    return [{{{display}}} for {values}, in zip(*columns)]\n")
+        namespace = {}
+        exec(source, namespace)
+        _BUILDERS[field_count] = namespace['build']
+    return _BUILDERS[field_count]
+
+_BUILDERS = {}
+
+
+class _Shape:
+    """
+    The field names and value types shared by a group of records.
+
+    Runs of records are encoded and decoded a column at a time. Version 1 records
+    are decoded with a struct holding one slot per field: the value itself, the
+    string index of a string, or the item count of a string list. The string
+    indexes of all list items follow the struct in field order.
+    """
+
+    def __init__(self, names, tags):
+        self.names = names
+        self.tags = tags
+        self.fixed = struct.Struct('<' + ''.join(_CODES[tag] for tag in tags))
+        self.string_slots = [slot for slot, tag in enumerate(tags) if tag == _STRING]
+        self.list_slots = [slot for slot, tag in enumerate(tags) if tag == _STRING_LIST]
+        self.json_slots = [slot for slot, tag in enumerate(tags) if tag == _JSON]
+        self.null_slots = [slot for slot, tag in enumerate(tags) if tag == _NULL]
+        self.build = _record_builder(len(names)) if names else None
+
+    def encode_run(self, ids, rows, strings):
+        # The IDs and columns of a run, from the field values of its records
+        index = strings.index
+        parts = [_to_bytes(map(index, ids))]
+        columns = zip(*rows) if rows else ()
+        for tag, column in zip(self.tags, columns):
+            if tag == _NULL:
+                continue
+            if tag == _STRING:
+                parts.append(_to_bytes(map(index, column)))
+            elif tag == _STRING_LIST:
+                parts.append(_to_bytes(map(len, column)))
+                parts.append(_to_bytes([index(item) for items in column for item in items]))
+            elif tag == _JSON:
+                parts.append(_to_bytes(index(json.dumps(value, separators=(',', ':'))) for value in column))
+            else:
+                parts.append(_to_bytes(column, _COLUMN_CODES[tag]))
+        return b''.join(parts)
+
+    def decode_run(self, buffer, offset, count, strings):
+        # The IDs and records of a run of ``count`` records, and the offset after it
+        def take(code, length):
+            nonlocal offset
+            start, offset = offset, offset + array(code).itemsize * length
+            return _from_bytes(buffer[start:offset], code)
+
+        ids = list(map(strings.__getitem__, take('I', count)))
+        columns = []
+        for tag in self.tags:
+            if tag == _NULL:
+                columns.append(repeat(None, count))
+            elif tag == _STRING:
+                columns.append(map(strings.__getitem__, take('I', count)))
+            elif tag == _STRING_LIST:
+                ends = list(accumulate(take('I', count)))
+                items = list(map(strings.__getitem__, take('I', ends[-1] if ends else 0)))
+                columns.append(map(items.__getitem__, map(slice, chain((0,), ends), ends)))
+            elif tag == _JSON:
+                columns.append(map(json.loads, map(strings.__getitem__, take('I', count))))
+            elif tag == _BOOL:
+                columns.append(map(bool, take('B', count)))
+            else:
+                columns.append(take(_COLUMN_CODES[tag], count).tolist())
+        if columns:
+            records = self.build(self.names, columns)
+        else:
+            records = [{} for _ in range(count)]
+        return ids, records, offset
+
+    def decode(self, buffer, offset, strings):
+        # One version 1 record
+        values = list(self.fixed.unpack_from(buffer, offset))
+        if self.list_slots:
+            offset += self.fixed.size
+            total = sum([values[slot] for slot in self.list_slots])
+            items = list(map(strings.__getitem__, _from_bytes(buffer[offset:offset + 4 * total])))
+            start = 0
+            for slot in self.list_slots:
+                end = start + values[slot]
+                values[slot] = items[start:end]
+                start = end
+        for slot in self.string_slots:
+            values[slot] = strings[values[slot]]
+        for slot in self.json_slots:
+            values[slot] = json.loads(strings[values[slot]])
+        for slot in self.null_slots:
+            values[slot] = None
+        return dict(zip(self.names, values))
+
+
+def encode_records(data):
+    """
+    Encodes a dictionary of records, keyed by ID, into the binary format.
+
+    Parameters:
+        data (dict): Records keyed by ID, as stored in the JSON files.
+
+    Returns:
+        bytes: The encoded file contents.
+    """
+    strings = _StringTable()
+    shapes = {}  # (field, tag) pairs -> (shape index, _Shape)
+    runs = []
+    run_shape, run_ids, run_rows = None, [], []
+
+    def end_run():
+        if run_ids:
+            runs.append(_RUN_HEAD.pack(len(run_ids), run_shape[0]))
+            runs.append(run_shape[1].encode_run(run_ids, run_rows, strings))
+
+    for entry_id, record in data.items():
+        key = tuple((field, _tag_of(value)) for field, value in record.items())
+        if key not in shapes:
+            shapes[key] = (len(shapes), _Shape([field for field, _ in key], [tag for _, tag in key]))
+        shape = shapes[key]
+        if shape is not run_shape or len(run_ids) == RUN_SIZE:
+            end_run()
+            run_shape, run_ids, run_rows = shape, [], []
+        run_ids.append(entry_id)
+        run_rows.append(tuple(record.values()))
+    end_run()
+
+    # Field names are indexed last, so they must be added before the table is written
+    shape_table = []
+    for key, (_, shape) in shapes.items():
+        shape_table.append(_SHAPE_COUNT.pack(len(key)))
+        for field, tag in key:
+            shape_table.append(_SHAPE_FIELD.pack(strings.index(field), tag))
+
+    blob = ''.join(strings.strings)
+    if '\0' in blob:
+        flags = 0
+        blob = blob.encode('utf-8')
+        string_table = [_to_bytes([len(value) for value in strings.strings]), _LENGTH.pack(len(blob)), blob]
+    else:
+        flags = _NUL_SEPARATED
+        blob = '\0'.join(strings.strings).encode('utf-8')
+        string_table = [_LENGTH.pack(len(blob)), blob]
+    header = _HEADER.pack(MAGIC, VERSION, flags, len(strings.strings), len(shapes), len(data))
+    return b''.join([header, *string_table, *shape_table, *runs])
+
+
+def _decode_tables(buffer):
+    magic, version, flags, string_count, shape_count, record_count = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary data file")
+    if version not in (1, VERSION):
+        raise ValueError(f"Unsupported binary data file version {version}")
+    offset = _HEADER.size
+
+    # Decode the blob in one go and cut it at the separators or character lengths
+    if flags & _NUL_SEPARATED:
+        lengths = None
+    else:
+        lengths = _from_bytes(buffer[offset:offset + 4 * string_count])
+        offset += 4 * string_count
+    (blob_length,) = _LENGTH.unpack_from(buffer, offset)
+    offset += 4
+    blob = bytes(buffer[offset:offset + blob_length]).decode('utf-8')
+    offset += blob_length
+    if lengths is None:
+        strings = blob.split('\0') if string_count else []
+    else:
+        ends = list(accumulate(lengths))
+        strings = list(map(blob.__getitem__, map(slice, chain((0,), ends), ends)))
+
+    shapes = []
+    for _ in range(shape_count):
+        (field_count,) = _SHAPE_COUNT.unpack_from(buffer, offset)
+        offset += _SHAPE_COUNT.size
+        names, tags = [], []
+        for _ in range(field_count):
+            name, tag = _SHAPE_FIELD.unpack_from(buffer, offset)
+            offset += _SHAPE_FIELD.size
+            if tag not in _CODES:
+                raise ValueError(f"Unknown value tag {tag} in binary data file")
+            names.append(strings[name])
+            tags.append(tag)
+        shapes.append(_Shape(names, tags))
+    return version, strings, shapes, record_count, offset
+
+
+def iter_decoded_records(buffer):
+    """
+    Yields the (id, record) pairs of an encoded file one at a time.
+
+    Parameters:
+        buffer (bytes): The encoded file contents, or any buffer over them.
+    """
+    for pairs in _iter_runs(buffer):
+        yield from pairs
+
+
+def _iter_runs(buffer):
+    # The (id, record) pairs of each run in turn; a version 1 file is one run
+    if len(buffer) == 0:
+        return
+    version, strings, shapes, record_count, offset = _decode_tables(buffer)
+    if version == 1:
+        yield _iter_version_1(buffer, offset, record_count, strings, shapes)
+        return
+    buffer = memoryview(buffer)
+    while record_count:
+        count, shape_index = _RUN_HEAD.unpack_from(buffer, offset)
+        ids, records, offset = shapes[shape_index].decode_run(buffer, offset + _RUN_HEAD.size, count, strings)
+        yield zip(ids, records)
+        record_count -= count
+
+
+def _iter_version_1(buffer, offset, record_count, strings, shapes):
+    for _ in range(record_count):
+        length, entry_id, shape_index = _RECORD_HEAD.unpack_from(buffer, offset)
+        yield strings[entry_id], shapes[shape_index].decode(buffer, offset + _RECORD_HEAD.size, strings)
+        offset += 4 + length
+
+
+def decode_records(buffer):
+    """
+    Decodes a file in the binary format back into a dictionary keyed by ID.
+    """
+    return dict(chain.from_iterable(_iter_runs(buffer)))
+
+
+def read_binary_file(path):
+    with open(path, 'rb') as binary_file:
+        return decode_records(binary_file.read())
+
+
+def write_binary_file(binary_file, data):
+    binary_file.write(encode_records(data))
+
+
+# -------------------------------------------
+# Converters
+# -------------------------------------------
+
+def convert_json_to_binary(json_path, binary_path=None):
+    """
+    Converts a JSON data file into the binary format.
+
+    Parameters:
+        json_path (str): Path of the JSON file, e.g. 'src/data/students.json'.
+        binary_path (str): Path of the file to create; defaults to the JSON path
+            with a '.bin' extension.
+
+    Returns:
+        str: The path of the binary file.
+    """
+    if binary_path is None:
+        binary_path = json_path.rsplit('.', 1)[0] + '.bin'
+    with open(json_path, 'r') as json_file:
+        data = json.load(json_file)
+    with open(binary_path, 'wb') as binary_file:
+        write_binary_file(binary_file, data)
+    return binary_path
+
+
+def convert_binary_to_json(binary_path, json_path=None):
+    """
+    Converts a binary data file back into an indented JSON file.
+
+    Parameters:
+        binary_path (str): Path of the binary file, e.g. 'src/data/students.bin'.
+        json_path (str): Path of the file to create; defaults to the binary path
+            with a '.json' extension.
+
+    Returns:
+        str: The path of the JSON file.
+    """
+    if json_path is None:
+        json_path = binary_path.rsplit('.', 1)[0] + '.json'
+    data = read_binary_file(binary_path)
+    with open(json_path, 'w') as json_file:
+        json.dump(data, json_file, indent=4)
+    return json_path
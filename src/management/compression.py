@@ -0,0 +1,151 @@
+import bz2
+import gzip
+import io
+import lzma
+import shutil
+from collections import namedtuple
+
+# -------------------------------------------
+# Transparent compression of data files
+# -------------------------------------------
+#
+# A data file is compressed when its name ends in one of the suffixes below
+# ('students.json.gz', 'shard-000.bin.xz'), or, whatever its name, when it starts
+# with the codec's magic bytes. Files are always read and written through the
+# codec's streaming interface, so neither the compressed nor the decompressed
+# bytes are ever held in memory as a whole on their way to or from the parser.
+
+# suffix: file name suffix, magic: leading bytes of every file, module: the
+# standard library codec, options: keyword arguments used when writing
+Codec = namedtuple('Codec', ['suffix', 'magic', 'module', 'options'])
+
+CODECS = {
+    'gzip': Codec('.gz', b'\x1f\x8b', gzip, {'compresslevel': 6}),
+    'lzma': Codec('.xz', b'\xfd7zXZ\x00', lzma, {'preset': 6}),
+    'bz2': Codec('.bz2', b'BZh', bz2, {'compresslevel': 9}),
+}
+
+_MAGIC_LENGTH = max(len(codec.magic) for codec in CODECS.values())
+
+
+def compression_from_name(path):
+    """
+    Returns the codec named by a file's suffix ('gzip', 'lzma', 'bz2'), or None.
+    """
+    for name, codec in CODECS.items():
+        if path.endswith(codec.suffix):
+            return name
+    return None
+
+
+def strip_compression_suffix(path):
+    compression = compression_from_name(path)
+    return path[:-len(CODECS[compression].suffix)] if compression else path
+
+
+def detect_compression(binary_file):
+    """
+    Returns the codec whose magic bytes start a binary file, or None, leaving the
+    file positioned where it was.
+    """
+    position = binary_file.tell()
+    head = binary_file.read(_MAGIC_LENGTH)
+    binary_file.seek(position)
+    for name, codec in CODECS.items():
+        if head.startswith(codec.magic):
+            return name
+    return None
+
+
+def decompressing_reader(binary_file, compression):
+    """
+    Wraps a binary file opened for reading in a stream of its decompressed bytes.
+    Closing the stream leaves the wrapped file open.
+    """
+    return CODECS[compression].module.open(binary_file, 'rb')
+
+
+def compressing_writer(binary_file, compression, text=False):
+    """
+    Wraps a binary file opened for writing in a stream that compresses what is
+    written to it. Text streams are UTF-8. Closing the stream finishes the
+    compressed data but leaves the wrapped file open.
+    """
+    codec = CODECS[compression]
+    stream = codec.module.open(binary_file, 'wb', **codec.options)
+    return io.TextIOWrapper(stream, encoding='utf-8') if text else stream
+
+
+def open_data_file(path, binary=True):
+    """
+    Opens a data file for reading, decompressing it on the fly if it is compressed.
+
+    Parameters:
+        path (str): Path of the file.
+        binary (bool): Return a binary stream; otherwise a text stream.
+
+    Returns:
+        file: A readable stream over the decompressed contents.
+    """
+    raw_file = open(path, 'rb')
+    try:
+        compression = compression_from_name(path) or detect_compression(raw_file)
+    except BaseException:
+        raw_file.close()
+        raise
+    if compression is None:
+        return raw_file if binary else io.TextIOWrapper(raw_file)
+    # Opened again by path, so that closing the stream also closes the file
+    raw_file.close()
+    codec = CODECS[compression]
+    if binary:
+        return codec.module.open(path, 'rb')
+    return codec.module.open(path, 'rt', encoding='utf-8')
+
+
+# -------------------------------------------
+# Converters
+# -------------------------------------------
+
+def compress_file(path, compression='gzip', destination=None):
+    """
+    Compresses a data file or archive, streaming it through the codec.
+
+    Parameters:
+        path (str): Path of the file, e.g. 'src/data/students.json'.
+        compression (str): 'gzip', 'lzma' or 'bz2'.
+        destination (str): Path of the file to create; defaults to the path with
+            the codec's suffix added.
+
+    Returns:
+        str: The path of the compressed file.
+    """
+    if compression not in CODECS:
+        raise ValueError(f"Unknown compression '{compression}'")
+    if destination is None:
+        destination = path + CODECS[compression].suffix
+    with open_data_file(path) as source, open(destination, 'wb') as binary_file:
+        with compressing_writer(binary_file, compression) as target:
+            shutil.copyfileobj(source, target)
+    return destination
+
+
+def decompress_file(path, destination=None):
+    """
+    Decompresses a compressed data file or archive.
+
+    Parameters:
+        path (str): Path of the compressed file, e.g. 'src/data/students.json.gz'.
+        destination (str): Path of the file to create; defaults to the path
+            without its compression suffix.
+
+    Returns:
+        str: The path of the decompressed file.
+    """
+    if destination is None:
+        destination = strip_compression_suffix(path)
+        if destination == path:
+            raise ValueError(f"Cannot derive a destination from '{path}'")
+    with open_data_file(path) as source, open(destination, 'wb') as binary_file:
+        shutil.copyfileobj(source, binary_file)
+    return destination
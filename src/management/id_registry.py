@@ -0,0 +1,291 @@
+import hashlib
+import json
+import math
+import os
+import struct
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from management.atomic_files import atomic_write
+
+# -------------------------------------------
+# Persistent ID registry
+# -------------------------------------------
+#
+# Every namespace ('people' for students and instructors, 'courses') is kept in
+# two files inside the registry directory:
+#
+#   <namespace>.bloom   header: magic 'SMSF', version (u16), hash count (u16),
+#                       bit count (u64), ID count (u64), signature (16 bytes),
+#                       followed by the bits of the Bloom filter
+#   <namespace>.ids     JSON list of every ID in the namespace
+#
+# Opening a namespace only reads the Bloom filter. An ID the filter has never
+# seen is reported as free right away; the exact ID list is read from disk the
+# first time the filter answers "maybe", to rule out false positives.
+#
+# The signature identifies the data the registry was saved from. If it does not
+# match the data found when the namespace is opened, the registry is rebuilt.
+
+MAGIC = b'SMSF'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sHHQQ16s')
+
+
+class BloomFilter:
+    """
+    Set membership test with no false negatives and a tunable false-positive rate.
+
+    Parameters:
+        bit_count (int): Size of the filter in bits.
+        hash_count (int): Number of bits set for every item.
+        bits (bytearray): Existing filter contents, e.g. read from disk.
+    """
+
+    def __init__(self, bit_count, hash_count, bits=None):
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((bit_count + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate=0.01):
+        """
+        Creates a filter sized to hold ``capacity`` items at the given false-positive rate.
+        """
+        capacity = max(capacity, 1)
+        bit_count = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        return cls(bit_count, hash_count)
+
+    def _positions(self, item):
+        # Double hashing: the i-th bit is h1 + i * h2, from one 128-bit digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bit_count for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class _Namespace:
+    def __init__(self, bloom, count, ids=None, signature=None):
+        self.bloom = bloom
+        self.count = count          # Number of IDs the filter was built for or has seen
+        self.ids = ids              # Exact set, read lazily
+        self.added = set()          # Changes made before the exact set was read
+        self.removed = set()
+        self.signature = signature  # Signature of the copy on disk
+        self.dirty = False          # IDs changed since the last save
+
+
+def _replace_file(path, data):
+    atomic_write(path, lambda binary_file: binary_file.write(data), binary=True)
+
+
+class IdRegistry:
+    """
+    Registry of the IDs in use, answering "is this ID taken?" mostly from memory.
+
+    Parameters:
+        directory (str): Directory holding the registry files.
+        error_rate (float): Target false-positive rate of the Bloom filters.
+    """
+
+    def __init__(self, directory, error_rate=0.01):
+        self.directory = directory
+        self.error_rate = error_rate
+        self._namespaces = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, namespace):
+        base = os.path.join(self.directory, namespace)
+        return base + '.bloom', base + '.ids'
+
+    def is_open(self, namespace):
+        return namespace in self._namespaces
+
+    def open(self, namespace, signature, load_ids):
+        """
+        Opens a namespace, rebuilding it if the saved copy is missing or stale.
+
+        Parameters:
+            namespace (str): Name of the namespace, e.g. 'people'.
+            signature (bytes): Up to 16 bytes identifying the current data.
+            load_ids (callable): Returns an iterable of every ID in use; only
+                called when the registry has to be rebuilt.
+        """
+        with self._lock:
+            if namespace in self._namespaces:
+                return
+            entry = self._read(namespace, signature)
+            if entry is None:
+                ids = set(load_ids())
+                entry = _Namespace(self._build_filter(ids), len(ids), ids)
+                entry.dirty = True
+            self._namespaces[namespace] = entry
+
+    def _read(self, namespace, signature):
+        bloom_path, ids_path = self._paths(namespace)
+        if not os.path.exists(ids_path):
+            return None
+        try:
+            with open(bloom_path, 'rb') as bloom_file:
+                header = bloom_file.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return None
+                magic, version, hash_count, bit_count, count, saved_signature = _HEADER.unpack(header)
+                if magic != MAGIC or version != VERSION or saved_signature != signature.ljust(16, b'\0'):
+                    return None
+                bits = bytearray(bloom_file.read())
+        except FileNotFoundError:
+            return None
+        if len(bits) != (bit_count + 7) // 8:
+            return None
+        return _Namespace(BloomFilter(bit_count, hash_count, bits), count, signature=signature)
+
+    def _build_filter(self, ids):
+        # Leave room to grow before the filter has to be rebuilt
+        bloom = BloomFilter.for_capacity(max(1024, 2 * len(ids)), self.error_rate)
+        for entry_id in ids:
+            bloom.add(entry_id)
+        return bloom
+
+    def _exact_ids(self, namespace, entry):
+        if entry.ids is None:
+            with open(self._paths(namespace)[1], 'r') as ids_file:
+                entry.ids = (set(json.load(ids_file)) | entry.added) - entry.removed
+            entry.added.clear()
+            entry.removed.clear()
+        return entry.ids
+
+    def contains(self, namespace, entry_id):
+        """
+        Checks whether an ID is in use. The exact ID list is only consulted when
+        the Bloom filter cannot rule the ID out.
+        """
+        with self._lock:
+            entry = self._namespaces[namespace]
+            if entry_id not in entry.bloom:
+                return False
+            return entry_id in self._exact_ids(namespace, entry)
+
+    def add(self, namespace, entry_id):
+        """
+        Records an ID as in use. Namespaces that are not open are left alone.
+
+        The exact list is not read for this; the change is merged into it when it
+        is next needed.
+        """
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is None:
+                return
+            if entry.ids is None:
+                entry.added.add(entry_id)
+                entry.removed.discard(entry_id)
+            elif entry_id in entry.ids:
+                return
+            else:
+                entry.ids.add(entry_id)
+            entry.count += 1
+            entry.dirty = True
+            if entry.count > self._capacity(entry):
+                ids = self._exact_ids(namespace, entry)
+                entry.bloom = self._build_filter(ids)
+                entry.count = len(ids)
+            else:
+                entry.bloom.add(entry_id)
+
+    def add_many(self, namespace, entry_ids):
+        """
+        Records a batch of IDs as in use, rebuilding the Bloom filter at most once.
+        """
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is None:
+                return
+            entry_ids = set(entry_ids)
+            if entry.ids is None:
+                entry.added |= entry_ids
+                entry.removed -= entry_ids
+            else:
+                entry_ids -= entry.ids
+                entry.ids |= entry_ids
+            if not entry_ids:
+                return
+            entry.count += len(entry_ids)
+            entry.dirty = True
+            if entry.count > self._capacity(entry):
+                ids = self._exact_ids(namespace, entry)
+                entry.bloom = self._build_filter(ids)
+                entry.count = len(ids)
+            else:
+                for entry_id in entry_ids:
+                    entry.bloom.add(entry_id)
+
+    def _capacity(self, entry):
+        # Number of items the filter was sized for
+        return int(entry.bloom.bit_count * math.log(2) / entry.bloom.hash_count)
+
+    def discard(self, namespace, entry_id):
+        """
+        Removes an ID. Its bits stay set in the Bloom filter, so later checks of it
+        fall through to the exact list.
+        """
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is None:
+                return
+            if entry.ids is None:
+                entry.removed.add(entry_id)
+                entry.added.discard(entry_id)
+            else:
+                entry.ids.discard(entry_id)
+            entry.dirty = True
+
+    def save(self, namespace, signature):
+        """
+        Writes a namespace back to disk if it changed since it was opened or saved.
+
+        Parameters:
+            namespace (str): Name of the namespace.
+            signature (bytes): Signature of the data the registry now matches.
+        """
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is None:
+                return
+            if not entry.dirty and entry.signature == signature:
+                return
+            bloom_path, ids_path = self._paths(namespace)
+            os.makedirs(self.directory, exist_ok=True)
+            if entry.dirty:
+                ids = self._exact_ids(namespace, entry)
+                _replace_file(ids_path, json.dumps(sorted(ids)).encode('utf-8'))
+            # The Bloom filter carries the signature, so it is written last
+            header = _HEADER.pack(MAGIC, VERSION, entry.bloom.hash_count, entry.bloom.bit_count,
+                                  entry.count, signature.ljust(16, b'\0'))
+            _replace_file(bloom_path, header + bytes(entry.bloom.bits))
+            entry.signature = signature
+            entry.dirty = False
+
+    def forget(self, namespace=None):
+        """
+        Closes a namespace, or all of them, without saving; the next ``open()``
+        checks it against the data again.
+        """
+        with self._lock:
+            if namespace is None:
+                self._namespaces.clear()
+            else:
+                self._namespaces.pop(namespace, None)
+
+    def namespaces(self):
+        return list(self._namespaces)
@@ -1,72 +1,1694 @@
+import atexit
+import copy
+import csv
+import hashlib
 import json
 import os
 import re
 import sys
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from management.school_entities import Student, Instructor, Course
+from management.binary_format import (decode_records, write_binary_file, iter_decoded_records,
+                                      convert_json_to_binary, convert_binary_to_json)
+from management.compression import (CODECS, compression_from_name, strip_compression_suffix, compressing_writer,
+                                    open_data_file, compress_file, decompress_file)
+from management.snapshot import SnapshotReader, write_snapshot, read_signature
+from management.atomic_files import atomic_write
+from management.id_registry import IdRegistry
+from management.lazy_records import LazyRecord
+from management.validation import RecordError, validate_records, check_record, is_valid_email, is_valid_age
 
-# Defining Methods for Serialization
-def save_data_to_json(obj, filename):
-    # Path to the 'data' directory
-    data_directory = 'src/data'
-    
-    # Construct the full path to the JSON file inside the 'data' folder
-    file_path = os.path.join(data_directory, filename)
-    # Create the file if it does not exist
-    if not os.path.exists(file_path):
-        with open(file_path, 'w') as json_file:
-            json.dump({}, json_file)  # Initialize with an empty dictionary
-
-    # Read existing data
-    with open(file_path, 'r') as json_file:
-        try:
-            data = json.load(json_file)
-        except json.JSONDecodeError:
-            data = {}  # In case the file is empty or invalid
+# Path to the 'data' directory
+DATA_DIRECTORY = 'src/data'
 
-    # Check the type of the object and save the appropriate data
+# Convert an entity into the (id, record) pair stored in the JSON files
+def _serialize(obj):
     if isinstance(obj, Student):
-        obj_id = obj.id  # Get the student ID
-        data[obj_id] = {
+        return obj.id, {
             "type": "student",
             "name": obj.name,
             "age": obj.age,
-            "email": obj.email,  
-            "registered_courses": [course  for course in obj.registered_courses] 
+            "email": obj.email,
+            "registered_courses": [course for course in obj.registered_courses]
         }
     elif isinstance(obj, Instructor):
-        obj_id = obj.id  # Get the instructor ID
-        data[obj_id] = {
+        return obj.id, {
             "type": "instructor",
             "name": obj.name,
             "age": obj.age,
-            "email": obj.email, 
-            "assigned_courses": obj.assigned_courses
+            "email": obj.email,
+            "assigned_courses": [course for course in obj.assigned_courses]
         }
     elif isinstance(obj, Course):
-        obj_id = obj.id  # Get the course ID
-        data[obj_id] = {
+        return obj.id, {
             "type": "course",
             "name": obj.name,
             "instructor": obj.instructor,
-            "students": [student  for student in obj.students] 
+            "students": [student for student in obj.students]
         }
     else:
         raise ValueError("Object must be an instance of Student, Instructor, or Course.")
 
-    # Write the updated data back to the file
-    with open(file_path, 'w') as json_file:
-        json.dump(data, json_file, indent=4)
+# Data file each kind of entity is stored in
+def _filename_of(obj):
+    if isinstance(obj, Student):
+        return 'students.json'
+    elif isinstance(obj, Instructor):
+        return 'instructors.json'
+    elif isinstance(obj, Course):
+        return 'courses.json'
+    raise ValueError("Object must be an instance of Student, Instructor, or Course.")
+
+# Replace a file in one step, so a crash leaves either the old or the new version
+def _atomic_write(file_path, write, binary=False, compression=None):
+    if not compression:
+        atomic_write(file_path, write, binary)
+        return
+
+    def write_compressed(temp_file):
+        with compressing_writer(temp_file, compression, text=not binary) as stream:
+            write(stream)
+    atomic_write(file_path, write_compressed, binary=True)
+
+# -------------------------------------------
+# In-memory write-back store
+# -------------------------------------------
+
+# Data files ending in '.bin' use the binary format, every other file is JSON; either
+# may carry a compression suffix ('.json.gz', '.bin.xz'), see compression.py
+def _is_binary(path):
+    return strip_compression_suffix(path).endswith('.bin')
+
+def _read_data_file(path):
+    if not os.path.exists(path):
+        return {}
+    if _is_binary(path):
+        with open_data_file(path) as binary_file:
+            return decode_records(binary_file.read())
+    with open_data_file(path, binary=False) as json_file:
+        try:
+            return json.load(json_file)
+        except json.JSONDecodeError:
+            return {}  # In case the file is empty or invalid
+
+def _write_data_file(path, data):
+    # Compressed by name only: a compressed file with a plain name is written back plain
+    compression = compression_from_name(path)
+    if _is_binary(path):
+        _atomic_write(path, lambda binary_file: write_binary_file(binary_file, data), binary=True,
+                      compression=compression)
+    else:
+        _atomic_write(path, lambda json_file: json.dump(data, json_file, indent=4), compression=compression)
+
+# Read a data file and replay its journal, if any, over it
+def _read_part_file(path):
+    return _read_part_state(path)[0]
+
+# Identity of a file's current contents; None if it does not exist
+def _file_stat(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+def _read_part_state(path):
+    # The records of a part, the stats of its files and how far its journal was read.
+    # Stats are taken first, so a change made while reading is seen by the next check.
+    data_stat, journal_stat = _file_stat(path), _file_stat(path + '.journal')
+    data = _read_data_file(path)
+    entries, journal_offset = _read_journal(path + '.journal')
+    _replay_entries(entries, data)
+    return data, (data_stat, journal_stat), journal_offset
+
+def _read_journal(journal_path, offset=0):
+    # Complete entries from a byte offset on, and the offset just past the last one
+    try:
+        with open(journal_path, 'rb') as journal_file:
+            journal_file.seek(offset)
+            content = journal_file.read()
+    except FileNotFoundError:
+        return [], 0
+    entries = []
+    for line in content.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break  # Still being appended
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            break  # A torn last line left by a crash mid-append
+        offset += len(line)
+    return entries, offset
+
+def _journal_entries(journal_path):
+    return iter(_read_journal(journal_path)[0])
+
+def _replay_entries(entries, data):
+    # Entries are absolute upserts/deletes, so replaying them twice is harmless
+    for entry in entries:
+        if entry["op"] == "upsert":
+            data[entry["id"]] = entry["record"]
+        elif entry["op"] == "delete":
+            data.pop(entry["id"], None)
+
+# -------------------------------------------
+# Streaming reader
+# -------------------------------------------
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+_NUMBER_CHARACTERS = frozenset('0123456789.eE+-')
+
+def _iter_json_object(json_file, chunk_size=64 * 1024):
+    """
+    Yields the (key, value) pairs of the top-level object of a JSON file one at a time.
+
+    Only the value being decoded and one read chunk are held in memory, instead of
+    the whole document.
+
+    Parameters:
+        json_file (file): Text file positioned at the start of the document.
+        chunk_size (int): Number of characters read at a time.
+    """
+    buffer = ''
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = json_file.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    def decode():
+        nonlocal position
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # A number may continue in the next chunk: "-2." decodes as -2 and "2.5e"
+            # as 2.5, so read on while the number reaches the buffer end or is cut
+            # short by a character that could still belong to it
+            if not eof and isinstance(value, (int, float)) and not isinstance(value, bool) and (
+                    end == len(buffer) or buffer[end] in _NUMBER_CHARACTERS):
+                fill()
+                continue
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            position = end
+            return value
+
+    def expect(characters):
+        nonlocal position
+        skip_whitespace()
+        if position >= len(buffer) or buffer[position] not in characters:
+            raise json.JSONDecodeError(f"Expecting one of {characters!r}", buffer, position)
+        position += 1
+        return buffer[position - 1]
+
+    fill()
+    skip_whitespace()
+    if eof and not buffer:
+        return  # An empty file holds no records
+    expect('{')
+    skip_whitespace()
+    if buffer.startswith('}', position):
+        return
+    while True:
+        skip_whitespace()
+        key = decode()
+        expect(':')
+        skip_whitespace()
+        value = decode()
+        yield key, value
+        if expect(',}') == '}':
+            return
+
+def _open_data_file(path):
+    try:
+        return open_data_file(path, binary=_is_binary(path))
+    except FileNotFoundError:
+        return None
+
+def _iter_data_file(path, data_file=None):
+    if data_file is None:
+        data_file = _open_data_file(path)
+        if data_file is None:
+            return
+    with data_file:
+        if _is_binary(path):
+            yield from iter_decoded_records(data_file.read())
+        else:
+            yield from _iter_json_object(data_file)
+
+def _open_part_file(path):
+    # Read the journal and open the data file up front: the open file keeps showing
+    # this version of the data even if it is replaced while it is being streamed
+    overlay = {}  # Latest journal entry per ID; deleted IDs map to None
+    for entry in _journal_entries(path + '.journal'):
+        overlay[entry["id"]] = entry["record"] if entry["op"] == "upsert" else None
+    return overlay, _open_data_file(path)
+
+# Stream a data file, overlaying its journal, without building the full dictionary
+def _iter_part_file(path, opened=None):
+    overlay, data_file = opened if opened is not None else _open_part_file(path)
+    if data_file is not None:
+        for entry_id, record in _iter_data_file(path, data_file):
+            if entry_id not in overlay:
+                yield entry_id, record
+    for entry_id, record in overlay.items():
+        if record is not None:
+            yield entry_id, record
+
+def _part_exists(path):
+    return os.path.exists(path) or os.path.exists(path + '.journal')
+
+def _shard_of(entry_id, shard_count):
+    # crc32 rather than hash(), which is salted differently in every process
+    return zlib.crc32(entry_id.encode('utf-8')) % shard_count
+
+
+# -------------------------------------------
+# Locks shared between processes
+# -------------------------------------------
+
+class LockTimeoutError(TimeoutError):
+    """
+    Raised when a data file stays locked by another process for too long.
+    """
+
+
+class _FileLock:
+    """
+    Advisory reader/writer lock on a lock file, shared by every process using it.
+
+    Any number of processes can hold it shared, to read, while an exclusive hold,
+    to write, waits for all of them and keeps everyone else out. Waiting is bounded
+    by ``timeout`` seconds, after which LockTimeoutError is raised.
+
+    Holds nest: a shared request inside an exclusive hold is granted at once, and
+    an exclusive request inside a shared one upgrades the lock until it ends. Without
+    ``fcntl`` (on Windows) holds are granted without locking anything.
+    """
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self._fd = None
+        self._held = []  # Whether each nested hold asked for exclusive access
+
+    @contextmanager
+    def hold(self, exclusive=False):
+        self._acquire(exclusive)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _acquire(self, exclusive):
+        if fcntl is not None and (not self._held or (exclusive and not any(self._held))):
+            self._lock(fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self._held.append(exclusive)
+
+    def _release(self):
+        exclusive = self._held.pop()
+        if fcntl is None:
+            return
+        if not self._held:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        elif exclusive and not any(self._held):
+            fcntl.flock(self._fd, fcntl.LOCK_SH)  # End of an upgrade
+
+    def _lock(self, operation):
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        deadline = time.monotonic() + self.timeout
+        delay = 0.005
+        while True:
+            try:
+                fcntl.flock(self._fd, operation | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeoutError(f"'{self.path}' is still locked after {self.timeout} seconds")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+
+    def close(self):
+        if self._fd is not None and not self._held:
+            os.close(self._fd)
+            self._fd = None
+
+
+class _Part:
+    """
+    One physical JSON file, with its journal, holding some or all records of a table.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.records = None  # Parsed lazily on first access
+        self.dirty = set()   # IDs changed since the last flush
+        self.stamp = None    # Stats of the data file and journal the records match
+        self.journal_offset = 0  # Bytes of the journal already applied to the records
+        self.pinned = None   # Records held by open views or a group commit; copied before they change
+        self.index_stamp = None  # Stats of the files the indexes were built from, while not cached
+
+
+class _Table:
+    """
+    The parts making up one logical data file such as 'students.json'.
+    """
+
+    def __init__(self, filename, parts, manifest_path=None, manifest_pending=False):
+        self.filename = filename
+        self.parts = parts
+        self.manifest_path = manifest_path
+        self.manifest_pending = manifest_pending  # New sharded layout not written yet
+        self.indexes = None  # Secondary indexes by name, built on first query
+
+    def part_for(self, entry_id):
+        if len(self.parts) == 1:
+            return self.parts[0]
+        return self.parts[_shard_of(entry_id, len(self.parts))]
+
+
+class StoreView:
+    """
+    Read-only view of data files as they were at one generation of a JsonStore.
+
+    The view holds on to the record dictionaries of that generation. The store
+    copies a dictionary before changing it while a view still uses it, so later
+    saves, deletes and flushes never show through and never wait for the view.
+
+    Parameters:
+        generation (int): The store generation the view was taken at.
+        tables (dict): Filename -> list of the record dictionaries of its parts.
+        release (callable): Called with ``tables`` when the view is closed.
+    """
+
+    def __init__(self, generation, tables, release=None):
+        self.generation = generation
+        self._tables = tables
+        self._release = release
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Let the store change the dictionaries in place again, instead of copying them
+        tables, self._tables = self._tables, {}
+        release, self._release = self._release, None
+        if release is not None:
+            release(tables)
+
+    def _part_records(self, filename, entry_id):
+        if filename not in self._tables:
+            raise KeyError(f"'{filename}' is not part of this view")
+        parts = self._tables[filename]
+        if len(parts) == 1:
+            return parts[0]
+        return parts[_shard_of(entry_id, len(parts))]
+
+    def get(self, filename, entry_id):
+        """
+        Returns a copy of the record stored under an ID, or None if there is none.
+        """
+        record = self._part_records(filename, entry_id).get(entry_id)
+        return copy.deepcopy(record) if record is not None else None
+
+    def contains(self, filename, entry_id):
+        return entry_id in self._part_records(filename, entry_id)
+
+    def get_entity(self, filename, entry_id):
+        """
+        Returns a ``LazyRecord`` over a copy of the record stored under an ID, or None.
+        """
+        record = self.get(filename, entry_id)
+        return LazyRecord(entry_id, record) if record is not None else None
+
+    def load(self, filename):
+        """
+        Returns a copy of every record of a file in this view.
+        """
+        data = {}
+        for records in self._tables[filename]:
+            data.update(copy.deepcopy(records))
+        return data
+
+    def iter_records(self, filename):
+        for records in self._tables[filename]:
+            for entry_id, record in records.items():
+                yield entry_id, copy.deepcopy(record)
+
+
+# -------------------------------------------
+# Secondary indexes
+# -------------------------------------------
+
+def normalize_name(name):
+    # Case- and spacing-insensitive form of a name, e.g. '  Jane  DOE' -> 'jane doe'
+    return ' '.join(str(name).split()).casefold()
+
+def normalize_email(email):
+    return str(email).strip().lower()
+
+
+class _Index:
+    """
+    Maps the values of one record field to the IDs of the records holding them.
+
+    List fields such as 'registered_courses' add one key per item, so the index of
+    a student's courses gives the students of each course.
+    """
+
+    def __init__(self, field, normalize=None):
+        self.field = field
+        self.normalize = normalize
+        self.entries = {}  # key -> set of IDs
+
+    def key(self, value):
+        return self.normalize(value) if self.normalize else value
+
+    def keys(self, record):
+        value = record.get(self.field)
+        if value is None:
+            return set()
+        values = value if isinstance(value, list) else [value]
+        return {self.key(item) for item in values}
+
+    def add(self, entry_id, record):
+        for key in self.keys(record):
+            self.entries.setdefault(key, set()).add(entry_id)
+
+    def remove(self, entry_id, record):
+        for key in self.keys(record):
+            ids = self.entries.get(key)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self.entries[key]
+
+    def lookup(self, value):
+        return sorted(self.entries.get(self.key(value), ()))
+
+
+# Indexes kept for each data file: index name -> (field, normalization)
+INDEXES = {
+    'students.json': {
+        'email': ('email', normalize_email),
+        'name': ('name', normalize_name),
+        'course': ('registered_courses', None),
+    },
+    'instructors.json': {
+        'email': ('email', normalize_email),
+        'name': ('name', normalize_name),
+    },
+    'courses.json': {
+        'name': ('name', normalize_name),
+        'instructor': ('instructor', None),
+    },
+}
+
+# ID namespace of each data file in the ID registry; students and instructors
+# share one, so a person's ID is unique across both files
+REGISTRY_NAMESPACES = {
+    'students.json': 'people',
+    'instructors.json': 'people',
+    'courses.json': 'courses',
+}
+
+# The data files of the application, as pinned together by default
+DATA_FILES = ('students.json', 'instructors.json', 'courses.json')
+
+
+# File extension used by each storage format
+_EXTENSIONS = {'json': '.json', 'binary': '.bin'}
+
+def _extension(format, compression=None):
+    return _EXTENSIONS[format] + (CODECS[compression].suffix if compression else '')
+
+
+class JsonStore:
+    """
+    Write-back cache over the JSON data files.
+
+    Each file is parsed once, on first use, and then served from memory. Saves and
+    deletes only update the cached dictionary and mark the entity as dirty; dirty
+    files are written back after ``flush_interval`` seconds, when ``flush()`` is
+    called, or when the interpreter shuts down.
+
+    In journal mode a flush does not rewrite the data file. The changed records are
+    appended as NDJSON lines to ``<filename>.journal`` instead, and the journal is
+    replayed over the data file on load. Once a journal grows past
+    ``compact_threshold`` bytes it is folded into a new data file and emptied.
+
+    Data files are replaced atomically and fsynced. Inside ``group_commit()`` automatic
+    flushes are held back, so a burst of saves is written with a single fsync per file.
+
+    With ``shards`` set, a file such as 'students.json' is stored as a directory
+    'students/' holding a ``manifest.json`` and that many ``shard-NNN.json`` files,
+    each record going to the shard picked by a CRC32 of its ID. Point reads, saves
+    and deletes only parse and rewrite one shard. Existing single-file data is split
+    into shards the first time it is opened; a sharded layout found on disk is
+    always used, whatever the setting.
+
+    With ``format='binary'`` the records are kept in the compact format of
+    ``binary_format`` ('students.bin' instead of 'students.json') behind the same API.
+    JSON data found on disk is converted the first time it is opened.
+
+    With ``compression`` set to 'gzip', 'lzma' or 'bz2', data files are stored
+    compressed ('students.json.gz', 'shard-000.bin.xz') and streamed through the
+    codec on every read and write. Uncompressed data found on disk is compressed the
+    first time it is opened, and converted back the same way when compression is
+    turned off. Compressed files with a plain name are recognized by their magic bytes.
+
+    ``snapshot()`` maintains a memory-mapped, read-only copy of a file ('students.snap')
+    indexed by ID. While a file is not cached, ``get()``, ``contains()`` and
+    ``iter_labels()`` are answered from that snapshot, decoding only the records
+    asked for, instead of parsing the whole file.
+
+    ``lookup()`` answers queries on the secondary indexes listed in ``INDEXES``. A
+    file's indexes are built by one pass over its records on the first query and
+    are then kept up to date by every save and delete.
+
+    ``id_in_use()`` checks IDs against the persistent ``IdRegistry`` in
+    '<data_directory>/registry/', whose Bloom filters answer most checks for unused
+    IDs from memory. The registry is saved on ``close()`` and rebuilt from the data
+    files if they changed since.
+
+    Several processes can share the data directory. Every file has a lock file next
+    to it ('students.lock'): reads hold it shared and writes exclusively, waiting at
+    most ``lock_timeout`` seconds before raising LockTimeoutError. Under the exclusive
+    lock a flush first reads what other processes wrote since the cache was loaded,
+    so their changes are merged record by record instead of being overwritten.
+
+    ``pin()`` returns a ``StoreView`` of one or more files at the current
+    ``generation``, which is bumped by every flush and by changes read from other
+    processes. Views are consistent across files and never block writers: the
+    store copies a record dictionary before changing it while a view uses it.
+    Changes made inside an open ``group_commit()`` are not visible to new views
+    until the group ends. A flush touching several files first writes the new
+    records to a '<data_directory>/<uuid>.txn' intent file, so a crash halfway
+    through is rolled forward by the next store that opens or writes the files.
+
+    Parameters:
+        data_directory (str): Directory holding the JSON files.
+        flush_interval (float): Seconds to wait after the first unsaved change before
+            writing it back. ``0`` writes through on every change and ``None``
+            only writes on ``flush()``/``close()``.
+        journal (bool): Persist changes by appending to a journal file.
+        compact_threshold (int): Journal size in bytes that triggers a compaction.
+        shards (int): Number of shards for new or migrated files; ``None`` keeps
+            the single-file layout.
+        format (str): 'json' or 'binary', the format of new or converted files.
+        compression (str): 'gzip', 'lzma' or 'bz2' to compress new or converted
+            files; ``None`` stores them uncompressed.
+        lock_timeout (float): Seconds to wait for another process's lock on a file.
+    """
+
+    def __init__(self, data_directory=DATA_DIRECTORY, flush_interval=2.0,
+                 journal=False, compact_threshold=1024 * 1024, shards=None, format='json',
+                 lock_timeout=10.0, compression=None):
+        if format not in _EXTENSIONS:
+            raise ValueError(f"Unknown data format '{format}'")
+        if compression is not None and compression not in CODECS:
+            raise ValueError(f"Unknown compression '{compression}'")
+        self.data_directory = data_directory
+        self.flush_interval = flush_interval
+        self.journal = journal
+        self.compact_threshold = compact_threshold
+        self.shards = shards
+        self.format = format
+        self.compression = compression
+        self.lock_timeout = lock_timeout
+        self._tables = {}   # filename -> _Table
+        self._file_locks = {}  # filename -> _FileLock
+        self._lock = threading.RLock()
+        self._timer = None
+        self._group_depth = 0
+        self._snapshots = {}  # filename -> SnapshotReader
+        self._registry = IdRegistry(os.path.join(data_directory, 'registry'))
+        self._registry_signatures = {}  # namespace -> signature of the files it matches
+        self.generation = 0      # Bumped whenever the data on disk changes
+        self._published = None   # _Part -> records visible to views during a group commit
+        self._pins = {}          # id(records) -> [part, records, open views and groups holding them]
+        self._recovering = False
+        atexit.register(self.close)
+
+    def path(self, filename):
+        # Construct the full path to the JSON file inside the 'data' folder
+        return os.path.join(self.data_directory, filename)
+
+    def shard_directory(self, filename):
+        return self.path(os.path.splitext(filename)[0])
+
+    def single_path(self, filename, format=None):
+        # Path of the single-file layout of a data file in the given format
+        return self.path(os.path.splitext(filename)[0] + _extension(format or self.format, self.compression))
+
+    def _stored_paths(self, filename):
+        # Every single-file path a data file may be found at, the configured one first
+        stem = os.path.splitext(filename)[0]
+        paths = [self.single_path(filename)]
+        for data_format in _EXTENSIONS:
+            for compression in (None, *CODECS):
+                path = self.path(stem + _extension(data_format, compression))
+                if path not in paths:
+                    paths.append(path)
+        return paths
+
+    def manifest_path(self, filename):
+        return os.path.join(self.shard_directory(filename), 'manifest.json')
+
+    def exists(self, filename):
+        """
+        Checks whether a data file exists on disk in any layout or format.
+        """
+        return (os.path.exists(self.manifest_path(filename))
+                or any(_part_exists(path) for path in self._stored_paths(filename)))
+
+    def create(self, filename):
+        """
+        Creates an empty data file in the configured format if none exists yet.
+        """
+        with self._lock, self._file_lock(filename).hold(exclusive=True):
+            if not self.exists(filename):
+                _write_data_file(self.single_path(filename), {})
+
+    # Locating and loading parts
+    # ---------------------------
+
+    def _open_table(self, filename, missing_ok):
+        manifest_path = self.manifest_path(filename)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as manifest_file:
+                manifest = json.load(manifest_file)
+            return _Table(filename, self._shard_parts(filename, manifest["shards"], manifest.get("format", "json"),
+                                                      manifest.get("compression")),
+                          manifest_path)
+
+        # Prefer the configured format, falling back to data left in another one
+        single_path = self.single_path(filename)
+        source_path = next((path for path in self._stored_paths(filename) if _part_exists(path)), None)
+        if source_path is None and not missing_ok:
+            raise FileNotFoundError(f"No such data file: '{single_path}'")
+
+        if self.shards:
+            table = _Table(filename, self._shard_parts(filename, self.shards, self.format, self.compression),
+                           manifest_path, manifest_pending=True)
+        else:
+            table = _Table(filename, [_Part(single_path)])
+        if source_path is not None and (self.shards or source_path != single_path):
+            self._migrate(source_path, table)
+        return table
+
+    def _shard_parts(self, filename, shard_count, format, compression=None):
+        shard_directory = self.shard_directory(filename)
+        extension = _extension(format, compression)
+        return [_Part(os.path.join(shard_directory, f'shard-{index:03d}{extension}'))
+                for index in range(shard_count)]
+
+    def _migrate(self, source_path, table):
+        # Move single-file data into a sharded layout and/or another format
+        for part in table.parts:
+            part.records = {}
+        for entry_id, record in _read_part_file(source_path).items():
+            table.part_for(entry_id).records[entry_id] = record
+        if table.manifest_path:
+            os.makedirs(os.path.dirname(table.manifest_path), exist_ok=True)
+        for part in table.parts:
+            self._write_part(part)
+        # The manifest is the commit point: until it exists the single file is used
+        if table.manifest_path:
+            self._write_manifest(table)
+        for leftover in (source_path, source_path + '.journal'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    def _write_manifest(self, table):
+        format = 'binary' if _is_binary(table.parts[0].path) else 'json'
+        manifest = {"layout": "sharded", "hash": "crc32", "shards": len(table.parts), "format": format}
+        compression = compression_from_name(table.parts[0].path)
+        if compression:
+            manifest["compression"] = compression
+        _atomic_write(table.manifest_path, lambda manifest_file: json.dump(manifest, manifest_file, indent=4))
+        table.manifest_pending = False
+
+    def _file_lock(self, filename):
+        lock = self._file_locks.get(filename)
+        if lock is None:
+            lock_path = self.path(os.path.splitext(filename)[0] + '.lock')
+            lock = self._file_locks[filename] = _FileLock(lock_path, self.lock_timeout)
+        return lock
+
+    def _table(self, filename, missing_ok=False):
+        table = self._tables.get(filename)
+        if table is None:
+            self._recover()
+            # Exclusive, as opening may migrate the file to another layout or format
+            with self._file_lock(filename).hold(exclusive=True):
+                table = self._open_table(filename, missing_ok)
+            self._tables[filename] = table
+        return table
+
+    def _load_part(self, table, part):
+        with self._file_lock(table.filename).hold():
+            if part.records is None:
+                part.records, part.stamp, part.journal_offset = _read_part_state(part.path)
+                if table.indexes is not None and part.stamp != part.index_stamp:
+                    # Changed on disk since the indexes streamed it
+                    table.indexes = None
+                self._publish(part)
+            else:
+                self._refresh(table, part)
+        return part.records
+
+    def _load_table(self, table):
+        # Parse the shards that are not cached yet side by side
+        with self._file_lock(table.filename).hold():
+            missing = [part for part in table.parts if part.records is None]
+            if len(missing) > 1:
+                with ThreadPoolExecutor(max_workers=min(8, len(missing))) as executor:
+                    for part, state in zip(missing, executor.map(_read_part_state, [part.path for part in missing])):
+                        part.records, part.stamp, part.journal_offset = state
+                        self._publish(part)
+            for part in table.parts:
+                self._load_part(table, part)
+
+    def _records(self, filename, entry_id, missing_ok=True):
+        table = self._table(filename, missing_ok)
+        return self._load_part(table, table.part_for(entry_id))
+
+    def _writable(self, table, entry_id):
+        # The loaded records of an ID's part, ready to be changed in place
+        part = table.part_for(entry_id)
+        self._load_part(table, part)
+        return self._unpinned(part)
+
+    def _unpinned(self, part):
+        # Copy on write: a dictionary held by a view is left as it is
+        if part.records is part.pinned:
+            part.records = dict(part.records)
+            part.pinned = None
+        return part.records
+
+    def _pin(self, part, records):
+        entry = self._pins.setdefault(id(records), [part, records, 0])
+        entry[2] += 1
+        if records is part.records:
+            part.pinned = records  # A dictionary already replaced is never changed again
+        return records
+
+    def _unpin(self, records):
+        # Once nothing holds a dictionary any more, its part may change it in place
+        entry = self._pins[id(records)]
+        entry[2] -= 1
+        if not entry[2]:
+            del self._pins[id(records)]
+            if entry[0].pinned is records:
+                entry[0].pinned = None
+
+    def _release_view(self, tables):
+        with self._lock:
+            for parts in tables.values():
+                for records in parts:
+                    self._unpin(records)
+
+    def _publish(self, part):
+        # Records loaded during a group commit are what views see until it ends
+        if self._published is not None and part not in self._published:
+            self._published[part] = self._pin(part, part.records)
+
+    # Change detection
+    # -----------------
+
+    def _refresh(self, table, part):
+        """
+        Brings a cached part up to date with changes other processes made on disk.
+
+        The inode, size and modification time of the data file and journal are
+        compared with those the cache was read from. If only the journal grew, just
+        the appended entries are read; if the data file changed, the part is parsed
+        again. Unsaved local changes are kept on top of what was read.
+        """
+        stamp = (_file_stat(part.path), _file_stat(part.journal_path))
+        if stamp == part.stamp:
+            return
+        (data_stat, journal_stat), (old_data_stat, old_journal_stat) = stamp, part.stamp
+        if data_stat == old_data_stat and journal_stat is not None and (
+                old_journal_stat is None
+                or (journal_stat[0] == old_journal_stat[0] and journal_stat[1] >= part.journal_offset)):
+            # Appended to: replay the new tail of the journal
+            entries, part.journal_offset = _read_journal(part.journal_path, part.journal_offset)
+            part.stamp = stamp
+            records = self._unpinned(part)
+            for entry in entries:
+                entry_id = entry["id"]
+                if entry_id in part.dirty:
+                    continue
+                new_record = entry["record"] if entry["op"] == "upsert" else None
+                self._reindex(table.filename, entry_id, records.get(entry_id), new_record)
+                if new_record is None:
+                    records.pop(entry_id, None)
+                else:
+                    records[entry_id] = new_record
+        else:
+            # Replaced or compacted: parse the part again
+            unsaved = {entry_id: part.records.get(entry_id) for entry_id in part.dirty}
+            part.records, part.stamp, part.journal_offset = _read_part_state(part.path)
+            for entry_id, record in unsaved.items():
+                if record is None:
+                    part.records.pop(entry_id, None)
+                else:
+                    part.records[entry_id] = record
+            table.indexes = None
+        self.generation += 1
+        # Other processes do not update this process's ID registry
+        if table.filename in REGISTRY_NAMESPACES:
+            self._registry.forget(REGISTRY_NAMESPACES[table.filename])
+
+    # Secondary indexes
+    # ------------------
+
+    def _indexes(self, filename):
+        table = self._table(filename, missing_ok=True)
+        # Refreshing a cached part keeps the indexes up to date; a part that was
+        # only streamed is checked against the files it was read from
+        for part in table.parts:
+            if table.indexes is None:
+                break
+            if part.records is not None:
+                self._load_part(table, part)
+            elif (_file_stat(part.path), _file_stat(part.journal_path)) != part.index_stamp:
+                table.indexes = None
+        if table.indexes is None:
+            indexes = {name: _Index(field, normalize)
+                       for name, (field, normalize) in INDEXES.get(filename, {}).items()}
+            for part in table.parts:
+                if part.records is None:
+                    part.index_stamp = (_file_stat(part.path), _file_stat(part.journal_path))
+            for entry_id, record in self._iter_records(filename):
+                for index in indexes.values():
+                    index.add(entry_id, record)
+            table.indexes = indexes
+        return table.indexes
+
+    def _reindex(self, filename, entry_id, old_record, new_record):
+        # Indexes not built yet will see the change when they are built
+        indexes = self._tables[filename].indexes
+        if not indexes:
+            return
+        for index in indexes.values():
+            if old_record is not None:
+                index.remove(entry_id, old_record)
+            if new_record is not None:
+                index.add(entry_id, new_record)
+
+    # Writing parts
+    # --------------
+
+    def _append_journal(self, part):
+        lines = []
+        for entry_id in part.dirty:
+            if entry_id in part.records:
+                entry = {"op": "upsert", "id": entry_id, "record": part.records[entry_id]}
+            else:
+                entry = {"op": "delete", "id": entry_id}
+            lines.append(json.dumps(entry, separators=(',', ':')) + '\n')
+        # Appends hold the exclusive lock and the part was just refreshed, so bytes
+        # past the last entry read are a line torn by a crash mid-append. Appending
+        # after them would glue the new entries onto a line no reader can decode.
+        journal_stat = _file_stat(part.journal_path)
+        if journal_stat is not None and journal_stat[1] > part.journal_offset:
+            os.truncate(part.journal_path, part.journal_offset)
+        with open(part.journal_path, 'a') as journal_file:
+            journal_file.write(''.join(lines))
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+            part.journal_offset = journal_file.tell()
+        part.stamp = (part.stamp[0] if part.stamp else _file_stat(part.path), _file_stat(part.journal_path))
+        return part.journal_offset
+
+    def _write_part(self, part):
+        # Write the new data file before dropping the journal it already contains
+        _write_data_file(part.path, part.records)
+        if os.path.exists(part.journal_path):
+            os.remove(part.journal_path)
+        part.stamp = (_file_stat(part.path), None)
+        part.journal_offset = 0
+
+    def _mark_dirty(self, filename, entry_id):
+        self._tables[filename].part_for(entry_id).dirty.add(entry_id)
+        if self._group_depth:
+            return  # Written when the outermost group commit ends
+        if self.flush_interval == 0:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self.flush_interval is not None and self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    # Public API
+    # -----------
+
+    def load(self, filename):
+        """
+        Returns a copy of every record stored in a file.
+
+        Changing the returned records does not change the store; use ``save()``.
+        """
+        with self._lock:
+            table = self._table(filename)
+            self._load_table(table)
+            data = {}
+            for part in table.parts:
+                data.update(copy.deepcopy(part.records))
+            return data
+
+    def iter_records(self, filename):
+        """
+        Yields the (id, record) pairs of a file without building the full dictionary.
+
+        Parts already cached, including unsaved changes, are served from memory; the
+        others are streamed from disk one record at a time. The records are copies,
+        as with ``load()``.
+        """
+        return self._iter_records(filename, copies=True)
+
+    def _iter_records(self, filename, copies=False):
+        # Without copies the cached records themselves are yielded, for readers
+        # inside the store that never change them
+        with self._lock:
+            table = self._table(filename)
+        for part in list(table.parts):
+            with self._lock:
+                if part.records is None:
+                    cached = None
+                    with self._file_lock(filename).hold():
+                        opened = _open_part_file(part.path)
+                else:
+                    cached = list(self._load_part(table, part).items())
+            if cached is None:
+                yield from _iter_part_file(part.path, opened)
+            elif copies:
+                # One record is copied at a time, so memory stays bounded
+                for entry_id, record in cached:
+                    yield entry_id, copy.deepcopy(record)
+            else:
+                yield from cached
+
+    def get(self, filename, entry_id):
+        """
+        Returns a copy of the record stored under an ID, or None if there is none.
+        """
+        with self._lock:
+            reader = self._uncached_snapshot(filename, entry_id)
+            if reader is not None:
+                return reader.get(entry_id)
+            record = self._records(filename, entry_id).get(entry_id)
+            return copy.deepcopy(record) if record is not None else None
+
+    def contains(self, filename, entry_id):
+        with self._lock:
+            reader = self._uncached_snapshot(filename, entry_id)
+            if reader is not None:
+                return entry_id in reader
+            return entry_id in self._records(filename, entry_id)
+
+    def iter_labels(self, filename):
+        """
+        Yields ``(id, name)`` pairs of a file, as shown in the listboxes.
+
+        Cached files are listed from memory. Otherwise the names are read from the
+        file's snapshot, which is built first if it is missing or out of date.
+        """
+        with self._lock:
+            cached = all(part.records is not None for part in self._table(filename).parts)
+        if not cached:
+            yield from self.snapshot(filename).labels()
+            return
+        for entry_id, record in self._iter_records(filename):
+            yield entry_id, str(record.get('name', ''))
+
+    def iter_entities(self, filename):
+        """
+        Yields a ``LazyRecord`` for every record of a file.
+
+        Like ``iter_labels()``, uncached files are listed from their snapshot: each
+        proxy holds the record's undecoded bytes and its name, so rows that only
+        show the name never decode the record.
+        """
+        with self._lock:
+            cached = all(part.records is not None for part in self._table(filename).parts)
+        if not cached:
+            for entry_id, label, raw in self.snapshot(filename).raw_items():
+                yield LazyRecord(entry_id, raw=raw, label=label)
+            return
+        for entry_id, record in self._iter_records(filename, copies=True):
+            yield LazyRecord(entry_id, record)
+
+    def get_entity(self, filename, entry_id):
+        """
+        Returns a ``LazyRecord`` over a copy of the record stored under an ID, or None.
+        """
+        with self._lock:
+            reader = self._uncached_snapshot(filename, entry_id)
+            if reader is not None:
+                raw = reader.raw(entry_id)
+                return LazyRecord(entry_id, raw=raw) if raw is not None else None
+            record = self._records(filename, entry_id).get(entry_id)
+            return LazyRecord(entry_id, copy.deepcopy(record)) if record is not None else None
+
+    def lookup(self, filename, index, value):
+        """
+        Returns the sorted IDs of the records whose indexed field matches a value.
+
+        Parameters:
+            filename (str): Name of the data file, e.g. 'students.json'.
+            index (str): Name of one of the file's indexes in ``INDEXES``.
+            value (str): Value to look up; it is normalized like the indexed field.
+
+        Returns:
+            list: The matching IDs, empty if there are none.
+        """
+        with self._lock:
+            indexes = self._indexes(filename)
+            if index not in indexes:
+                raise KeyError(f"No index '{index}' on '{filename}'")
+            return indexes[index].lookup(value)
+
+    # Snapshots
+    # ----------
+
+    def snapshot_path(self, filename):
+        return self.path(os.path.splitext(filename)[0] + '.snap')
+
+    def _signature(self, filename):
+        # Size and modification time of every file the records are read from
+        digest = hashlib.blake2b(digest_size=8)
+        for part in self._table(filename, missing_ok=True).parts:
+            for path in (part.path, part.journal_path):
+                try:
+                    stat = os.stat(path)
+                    digest.update(f'{path}:{stat.st_size}:{stat.st_mtime_ns};'.encode('utf-8'))
+                except FileNotFoundError:
+                    digest.update(f'{path}:-;'.encode('utf-8'))
+        return digest.digest()
+
+    def snapshot(self, filename):
+        """
+        Returns a memory-mapped snapshot of a file, flushing unsaved changes and
+        rebuilding the snapshot first if it does not match the data on disk.
+        """
+        with self._lock:
+            self.flush()
+            signature = self._signature(filename)
+            reader = self._snapshots.get(filename)
+            if reader is not None and reader.signature == signature:
+                return reader
+            path = self.snapshot_path(filename)
+            if read_signature(path) != signature:
+                _atomic_write(path, lambda binary_file: write_snapshot(binary_file, self._iter_records(filename), signature),
+                              binary=True)
+            # Readers handed out earlier are left open for whoever still uses them
+            reader = self._snapshots[filename] = SnapshotReader(path)
+            return reader
+
+    def _uncached_snapshot(self, filename, entry_id):
+        # An up-to-date snapshot to answer a point read from, if the record's part
+        # is not cached; existing snapshots are used but never built here
+        part = self._table(filename, missing_ok=True).part_for(entry_id)
+        if part.records is not None:
+            return None
+        signature = self._signature(filename)
+        reader = self._snapshots.get(filename)
+        if reader is None or reader.signature != signature:
+            if read_signature(self.snapshot_path(filename)) != signature:
+                return None
+            reader = self._snapshots[filename] = SnapshotReader(self.snapshot_path(filename))
+        return reader
+
+    # ID registry
+    # ------------
+
+    def _namespace_files(self, namespace):
+        return [filename for filename, name in REGISTRY_NAMESPACES.items() if name == namespace]
+
+    def _namespace_signature(self, namespace):
+        digest = hashlib.blake2b(digest_size=16)
+        for filename in self._namespace_files(namespace):
+            digest.update(self._signature(filename))
+        return digest.digest()
+
+    def id_in_use(self, namespace, entry_id):
+        """
+        Checks whether an ID is taken by any file of a registry namespace.
+
+        Parameters:
+            namespace (str): 'people' (students and instructors) or 'courses'.
+            entry_id (str): The ID to check.
+        """
+        with self._lock:
+            if (self._registry.is_open(namespace)
+                    and self._namespace_signature(namespace) != self._registry_signatures.get(namespace)):
+                # Another process wrote the files since the registry last matched them
+                self._registry.forget(namespace)
+            if not self._registry.is_open(namespace):
+                # Unsaved changes would not be covered by the saved registry
+                self.flush()
+                filenames = self._namespace_files(namespace)
+                # Catch up with other processes first: a refresh while the registry
+                # is being rebuilt would try to forget it from inside open()
+                for filename in filenames:
+                    table = self._table(filename, missing_ok=True)
+                    for part in table.parts:
+                        if part.records is not None:
+                            self._load_part(table, part)
+                signature = self._namespace_signature(namespace)
+                self._registry.open(namespace, signature,
+                                    lambda: [entry_id for filename in filenames
+                                             for entry_id, _ in self._iter_records(filename)])
+                self._registry_signatures[namespace] = signature
+            return self._registry.contains(namespace, entry_id)
+
+    def _registry_written(self, filenames):
+        # Files written by this store still match the registry, which saw the changes
+        for namespace in self._registry.namespaces():
+            if any(REGISTRY_NAMESPACES.get(filename) == namespace for filename in filenames):
+                self._registry_signatures[namespace] = self._namespace_signature(namespace)
+
+    def _save_registry(self):
+        # Files changed by someone else since they were last seen make the registry
+        # stale; it is then dropped and rebuilt the next time it is opened
+        for namespace in self._registry.namespaces():
+            signature = self._namespace_signature(namespace)
+            if signature == self._registry_signatures.get(namespace):
+                self._registry.save(namespace, signature)
+            else:
+                self._registry.forget(namespace)
+
+    def _unregister(self, filename, entry_id):
+        # The ID stays taken while another file of the namespace still uses it
+        namespace = REGISTRY_NAMESPACES.get(filename)
+        if namespace is None or not self._registry.is_open(namespace):
+            return
+        if not any(self.contains(other, entry_id) for other in self._namespace_files(namespace) if other != filename):
+            self._registry.discard(namespace, entry_id)
+
+    def save(self, obj, filename):
+        """
+        Inserts or replaces the record of a Student, Instructor or Course.
+        """
+        obj_id, record = _serialize(obj)
+        with self._lock:
+            records = self._writable(self._table(filename, missing_ok=True), obj_id)
+            self._reindex(filename, obj_id, records.get(obj_id), record)
+            records[obj_id] = record
+            if filename in REGISTRY_NAMESPACES:
+                self._registry.add(REGISTRY_NAMESPACES[filename], obj_id)
+            self._mark_dirty(filename, obj_id)
+
+    def delete(self, entry_id, filename):
+        """
+        Deletes a record, returning False if the ID was not stored in the file.
+        """
+        with self._lock:
+            records = self._writable(self._table(filename), entry_id)
+            if entry_id not in records:
+                return False
+            self._reindex(filename, entry_id, records.pop(entry_id), None)
+            self._unregister(filename, entry_id)
+            self._mark_dirty(filename, entry_id)
+            return True
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+            if not self._group_depth:
+                try:
+                    self.flush()
+                except LockTimeoutError:
+                    self._schedule_flush()  # Another process is busy; try again later
+
+    def flush(self):
+        """
+        Writes every file with unsaved changes back to disk as one new generation.
+
+        The files are written under their exclusive locks, all taken up front, after
+        catching up with changes other processes made to them; records changed here
+        win over theirs. When several files are written, their new records are first
+        saved to an intent file, which is removed once every file is written.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            written = sorted(filename for filename, table in self._tables.items()
+                             if any(part.dirty for part in table.parts))
+            if not written:
+                return
+            while True:
+                self._recover()
+                with ExitStack() as stack:
+                    # Always locked in name order, so two flushes cannot deadlock
+                    for filename in written:
+                        stack.enter_context(self._file_lock(filename).hold(exclusive=True))
+                    if self._intent_paths():
+                        continue  # Left by a crash while we waited: roll it forward first
+                    tables = [self._tables[filename] for filename in written]
+                    for table in tables:
+                        for part in table.parts:
+                            if part.dirty:
+                                self._refresh(table, part)
+                    intent_path = self._write_intent(tables) if len(tables) > 1 else None
+                    for table in tables:
+                        self._write_table(table)
+                    if intent_path is not None:
+                        os.remove(intent_path)
+                    break
+            self.generation += 1
+            self._registry_written(written)
+
+    def _write_table(self, table):
+        if table.manifest_pending:
+            os.makedirs(os.path.dirname(table.manifest_path), exist_ok=True)
+            self._write_manifest(table)
+        for part in table.parts:
+            if not part.dirty:
+                continue
+            if self.journal:
+                journal_size = self._append_journal(part)
+                if journal_size > self.compact_threshold:
+                    self._write_part(part)
+            else:
+                self._write_part(part)
+            part.dirty.clear()
+
+    # Multi-file commits
+    # -------------------
+
+    def _intent_paths(self):
+        try:
+            names = os.listdir(self.data_directory)
+        except FileNotFoundError:
+            return []
+        return sorted(os.path.join(self.data_directory, name) for name in names
+                      if name.endswith('.txn') and not name.startswith('.'))
+
+    def _write_intent(self, tables):
+        # Redo log of a flush: the new record of every changed ID, None if deleted
+        changes = {table.filename: {entry_id: part.records.get(entry_id)
+                                    for part in table.parts for entry_id in part.dirty}
+                   for table in tables}
+        intent = {"generation": self.generation + 1, "changes": changes}
+        intent_path = self.path(f'{uuid.uuid4().hex}.txn')
+        _atomic_write(intent_path, lambda intent_file: json.dump(intent, intent_file))
+        return intent_path
+
+    def _recover(self):
+        """
+        Rolls forward multi-file flushes interrupted by a crash.
+
+        An intent file whose files can all be locked exclusively has no live writer.
+        Its records are applied to the files on disk and the file is removed; caches
+        pick the changes up like any other change made by another process.
+        """
+        if self._recovering:
+            return
+        with self._lock:
+            self._recovering = True
+            try:
+                for intent_path in self._intent_paths():
+                    try:
+                        with open(intent_path, 'r') as intent_file:
+                            changes = json.load(intent_file)["changes"]
+                    except FileNotFoundError:
+                        continue  # Its writer finished in the meantime
+                    with ExitStack() as stack:
+                        for filename in sorted(changes):
+                            stack.enter_context(self._file_lock(filename).hold(exclusive=True))
+                        if not os.path.exists(intent_path):
+                            continue
+                        for filename, records in changes.items():
+                            self._apply_on_disk(self._table(filename, missing_ok=True), records)
+                        os.remove(intent_path)
+            finally:
+                self._recovering = False
+
+    def _apply_on_disk(self, table, records):
+        by_part = {}
+        for entry_id, record in records.items():
+            by_part.setdefault(table.part_for(entry_id), {})[entry_id] = record
+        if table.manifest_pending:
+            os.makedirs(os.path.dirname(table.manifest_path), exist_ok=True)
+        for part, part_records in by_part.items():
+            data = _read_part_file(part.path)
+            for entry_id, record in part_records.items():
+                if record is None:
+                    data.pop(entry_id, None)
+                else:
+                    data[entry_id] = record
+            _write_data_file(part.path, data)
+            if os.path.exists(part.journal_path):
+                os.remove(part.journal_path)
+        if table.manifest_pending:
+            self._write_manifest(table)
+
+    def compact(self, filename=None):
+        """
+        Folds journals into their data files, regardless of their size.
+
+        Parameters:
+            filename (str): Only compact this file; compacts every journal if omitted.
+        """
+        with self._lock:
+            self.flush()
+            filenames = [filename] if filename else list(self._tables)
+            for name in filenames:
+                table = self._table(name, missing_ok=True)
+                with self._file_lock(name).hold(exclusive=True):
+                    for part in table.parts:
+                        if os.path.exists(part.journal_path):
+                            self._load_part(table, part)
+                            self._write_part(part)
+            self._registry_written(filenames)
+
+    @contextmanager
+    def group_commit(self):
+        """
+        Holds back automatic flushes until the block ends, then commits every change
+        made inside it together. Group commits can be nested.
+        """
+        with self._lock:
+            if not self._group_depth:
+                # Views taken during the group keep seeing the records as they are now
+                self._published = {}
+                for table in self._tables.values():
+                    for part in table.parts:
+                        if part.records is not None:
+                            self._published[part] = self._pin(part, part.records)
+            self._group_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._group_depth -= 1
+                if not self._group_depth:
+                    published, self._published = self._published, None
+                    for records in published.values():
+                        self._unpin(records)
+                    self.flush()
+
+    @contextmanager
+    def transaction(self, *filenames):
+        """
+        Runs a read, modify and save cycle on data files as one step for every process.
+
+        The exclusive locks of the files are taken when the block starts, after which
+        cached records are brought up to date, and held until the changes made inside
+        the block are flushed at its end. Another process cannot save between a read
+        and the save that depends on it, so lists such as a course's students are not
+        overwritten with an older copy. Every file written inside the block must be
+        named; transactions can be nested.
+
+        Parameters:
+            *filenames (str): Files read and written; all three data files if omitted.
+        """
+        filenames = sorted(set(filenames or DATA_FILES))
+        with self._lock:
+            with ExitStack() as stack:
+                while True:
+                    self._recover()
+                    tables = [self._table(filename, missing_ok=True) for filename in filenames]
+                    # Locked in name order, like flush(), so transactions cannot deadlock
+                    for filename in filenames:
+                        stack.enter_context(self._file_lock(filename).hold(exclusive=True))
+                    if not self._intent_paths():
+                        break
+                    stack.close()  # Left by a crash while we waited: roll it forward first
+                for table in tables:
+                    for part in table.parts:
+                        if part.records is not None:
+                            self._load_part(table, part)
+                with self.group_commit():
+                    yield self
+
+    def pin(self, *filenames):
+        """
+        Returns a consistent, read-only view of data files at the current generation.
+
+        Parameters:
+            *filenames (str): Files to include; students, instructors and courses
+                if omitted.
+
+        Returns:
+            StoreView: The records of every file as of one generation. Unsaved
+            changes are included, except those of an open group commit.
+        """
+        filenames = sorted(set(filenames or DATA_FILES))
+        with self._lock:
+            while True:
+                self._recover()
+                tables = {filename: self._table(filename, missing_ok=True) for filename in filenames}
+                with ExitStack() as stack:
+                    for filename in filenames:
+                        stack.enter_context(self._file_lock(filename).hold())
+                    if self._intent_paths():
+                        continue
+                    views = {}
+                    for filename, table in tables.items():
+                        self._load_table(table)
+                        views[filename] = [self._pinned_records(part) for part in table.parts]
+                    return StoreView(self.generation, views, self._release_view)
+
+    def _pinned_records(self, part):
+        if self._published is not None and part in self._published:
+            return self._pin(part, self._published[part])
+        return self._pin(part, part.records)
+
+    def invalidate(self, filename=None):
+        """
+        Flushes and drops cached data so the next access re-reads it from disk.
+        """
+        with self._lock:
+            self.flush()
+            if filename is None:
+                self._tables.clear()
+                self._registry.forget()
+            else:
+                self._tables.pop(filename, None)
+                if filename in REGISTRY_NAMESPACES:
+                    self._registry.forget(REGISTRY_NAMESPACES[filename])
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._save_registry()
+            for lock in self._file_locks.values():
+                lock.close()
+
+
+# Store shared by the module-level helpers below
+_store = JsonStore()
+
+def get_json_store():
+    return _store
+
+def configure_json_store(**options):
+    """
+    Replaces the shared store, flushing any unsaved changes of the current one first.
+
+    Parameters:
+        **options: Keyword arguments forwarded to ``JsonStore``.
+    """
+    global _store
+    _store.close()
+    _store = JsonStore(**options)
+    return _store
+
+def flush_json_data():
+    _store.flush()
+
+def group_commit():
+    """
+    Commits all saves and deletes made inside a ``with`` block with one write per file.
+    """
+    return _store.group_commit()
+
+def transaction(*filenames):
+    """
+    Reads and saves records of several data files as one step, while other processes wait.
+
+    Use it in a ``with`` block around the reads a change is based on and the saves
+    that make it, such as adding a student to a course's list.
+
+    Parameters:
+        *filenames (str): Every file read or written in the block; all three data files if omitted.
+    """
+    return _store.transaction(*filenames)
+
+def pin_generation(*filenames):
+    """
+    Returns a read-only view of data files that stays consistent while others write.
+
+    Use it in a ``with`` block to read related records of several files, such as a
+    student and a course, from one generation of the data.
+
+    Parameters:
+        *filenames (str): Files to include; all three data files if omitted.
+
+    Returns:
+        StoreView: The view, with ``get()``, ``contains()``, ``load()`` and ``iter_records()``.
+    """
+    return _store.pin(*filenames)
+
+# Defining Methods for Serialization
+def save_data_to_json(obj, filename):
+    # The record only reaches the disk on the next flush of the shared store
+    _store.save(obj, filename)
 
 # Loading data from a JSON file
 def load_data_from_json(filename):
-    # Path to the 'data' directory
-    data_directory = 'src/data'
-    
-    # Construct the full path to the JSON file inside the 'data' folder
-    file_path = os.path.join(data_directory, filename)
-    with open(file_path, 'r') as json_file:
-        return json.load(json_file)
+    return _store.load(filename)
+
+def iter_records(filename):
+    """
+    Iterates over the entries of a JSON file in bounded memory.
+
+    Parameters:
+        filename (str): Name of the file inside the data directory, e.g. 'students.json'.
+
+    Yields:
+        tuple: ``(id, record)`` pairs, one entry at a time.
+    """
+    return _store.iter_records(filename)
+
+def iter_labels(filename):
+    """
+    Iterates over the (id, name) pairs of a JSON file, for listbox rows and dropdowns.
+
+    Uncached files are listed from their memory-mapped snapshot without decoding
+    any record.
+    """
+    return _store.iter_labels(filename)
+
+def get_record(filename, entry_id):
+    """
+    Returns a copy of the record stored under an ID in a JSON file, or None if there is none.
+    """
+    return _store.get(filename, entry_id)
+
+def contains_record(filename, entry_id):
+    """
+    Checks whether a JSON file stores a record under an ID, without decoding it.
+    """
+    return _store.contains(filename, entry_id)
+
+def iter_entities(filename):
+    """
+    Iterates over the records of a JSON file as ``LazyRecord`` proxies, which are
+    only decoded and turned into entities when a field needs it.
+    """
+    return _store.iter_entities(filename)
+
+def get_entity(filename, entry_id):
+    """
+    Returns a ``LazyRecord`` for the record stored under an ID, or None if there is none.
+    """
+    return _store.get_entity(filename, entry_id)
+
+def find_by_email(filename, email):
+    """
+    Returns the ID of the person registered with an email address, or None.
+
+    Emails are compared case-insensitively.
+
+    Parameters:
+        filename (str): 'students.json' or 'instructors.json'.
+        email (str): The email address to look up.
+    """
+    ids = _store.lookup(filename, 'email', email)
+    return ids[0] if ids else None
+
+def find_by_name(filename, name):
+    """
+    Returns the IDs of the records with a name, ignoring case and extra spaces.
+    """
+    return _store.lookup(filename, 'name', name)
+
+def students_in_course(course_id):
+    """
+    Returns the IDs of the students whose registered courses include a course.
+    """
+    return _store.lookup('students.json', 'course', course_id)
+
+def courses_of_instructor(instructor_id):
+    """
+    Returns the IDs of the courses an instructor is assigned to.
+    """
+    return _store.lookup('courses.json', 'instructor', instructor_id)
+
+def export_records_to_csv(filename, csv_path):
+    """
+    Writes the entries of a JSON file to a CSV file, streaming one entry at a time.
+
+    List fields such as 'registered_courses' are joined with ';'.
+
+    Parameters:
+        filename (str): Name of the file inside the data directory, e.g. 'students.json'.
+        csv_path (str): Path of the CSV file to create.
+
+    Returns:
+        int: The number of exported entries.
+    """
+    count = 0
+    with open(csv_path, 'w', newline='') as csv_file:
+        writer = None
+        for entry_id, record in iter_records(filename):
+            row = {"id": entry_id}
+            for field, value in record.items():
+                row[field] = ';'.join(value) if isinstance(value, list) else value
+            if writer is None:
+                writer = csv.DictWriter(csv_file, fieldnames=list(row), extrasaction='ignore')
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+    return count
 
 def delete_from_json(entry_id : str, filename : str):
     """
@@ -75,66 +1697,109 @@ def delete_from_json(entry_id : str, filename : str):
     Parameters:
         entry_id (str): The ID of the entry to be deleted.
         file_path (str): The path to the JSON file to be modified.
+
+    Returns:
+        bool: True if the entry existed and was deleted, False otherwise.
     """
-    # Path to the 'data' directory
-    data_directory = 'src/data'
-    
-    # Construct the full path to the JSON file inside the 'data' folder
-    file_path = os.path.join(data_directory, filename)
-    with open(file_path, 'r') as json_file:
-        data = json.load(json_file)
+    return _store.delete(entry_id, filename)
 
-    if entry_id in data:
-        # Delete the entry from the loaded data
-        del data[entry_id]
+# Bulk operations
+def _check_stored_email(obj, filename):
+    # The email of a person must not belong to anybody else already stored
+    if filename == 'courses.json':
+        return
+    for people_file in ('students.json', 'instructors.json'):
+        owner = find_by_email(people_file, obj.email)
+        if owner is not None and (people_file, owner) != (filename, obj.id):
+            raise ValueError(f"Email {obj.email} is already in use")
 
-        # Save the modified data back to the JSON file
-        with open(file_path, 'w') as file:
-            json.dump(data, file, indent=4)
+def save_many(objs):
+    """
+    Inserts or replaces a batch of Students, Instructors and Courses.
 
-        return True
-    else:
-        return False
+    The whole batch is first checked by ``validate_records``, which also catches IDs
+    and emails repeated inside it. Valid objects are then applied in memory one by
+    one, so invalid ones are reported without aborting the rest of the batch. Each
+    affected file is written once, instead of once per object.
 
-#2. Implementing Data Validation
-def is_valid_email(email: str):
-    email_regex = r'^\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    return re.match(email_regex, email) is not None
+    Parameters:
+        objs (iterable): Student, Instructor and Course objects, in any mix.
 
-def is_valid_age(age: int):
-    return age >= 0
+    Returns:
+        list: One dict per object, in order, with its 'id', 'filename', 'ok' and,
+        for failures, the 'error' message.
+    """
+    objs = list(objs)
+    errors = {}
+    for error in validate_records(objs):
+        errors.setdefault(error.index, error.message)
+
+    results = []
+    with group_commit():
+        for index, obj in enumerate(objs):
+            result = {"id": getattr(obj, 'id', None), "filename": None, "ok": False, "error": errors.get(index)}
+            try:
+                result["filename"] = _filename_of(obj)
+                if result["error"] is None:
+                    _check_stored_email(obj, result["filename"])
+                    _store.save(obj, result["filename"])
+                    result["ok"] = True
+            except ValueError as e:
+                result["error"] = str(e)
+            results.append(result)
+    return results
 
+def delete_many(entry_ids, filename):
+    """
+    Deletes a batch of entries from one data file, writing the file once.
+
+    Parameters:
+        entry_ids (iterable): IDs of the entries to delete.
+        filename (str): Name of the data file, e.g. 'students.json'.
+
+    Returns:
+        list: One dict per ID, in order, with its 'id', 'ok' and, for IDs that
+        were not found, the 'error' message.
+    """
+    results = []
+    with group_commit():
+        for entry_id in entry_ids:
+            deleted = _store.delete(entry_id, filename)
+            results.append({"id": entry_id, "ok": deleted,
+                            "error": None if deleted else f"ID {entry_id} not found"})
+    return results
+
+#2. Implementing Data Validation
+# is_valid_email, is_valid_age and the batch engine validate_records live in
+# management.validation, which database.py shares
 def validate_and_add_user(obj):
-    if not is_valid_email(obj.email):
-        raise ValueError("Invalid email address")
-    if not is_valid_age(obj.age):
-        raise ValueError("Age must be non-negative")
-    if obj.id in load_data_from_json('students.json'):
-        raise ValueError(f"Student with ID {obj.id} already exists")
-    if obj.id in load_data_from_json('instructors.json'):
+    check_record(obj)
+    # The registry rules out most new IDs without reading either file
+    if _store.id_in_use('people', obj.id):
+        if _store.contains('students.json', obj.id):
+            raise ValueError(f"Student with ID {obj.id} already exists")
         raise ValueError(f"Instructor with ID {obj.id} already exists")
+    for filename in ('students.json', 'instructors.json'):
+        if find_by_email(filename, obj.email) is not None:
+            raise ValueError(f"Email {obj.email} is already in use")
 
 def validate_and_add_course(obj):
-    if obj.id in load_data_from_json('courses.json'):
+    if _store.id_in_use('courses', obj.id):
         raise ValueError(f"Course with ID {obj.id} already exists")
     print(f"Adding {obj.name} to the system.")
 
 # Function to create JSON files if they do not exist
 def create_json_files():
     # Directory where the JSON files will be stored
-    data_directory = 'src/data'
+    data_directory = _store.data_directory
 
     # Create the directory if it doesn't exist
     if not os.path.exists(data_directory):
         os.makedirs(data_directory)
 
-    # File names with paths pointing to the data directory
-    file_names = [os.path.join(data_directory, 'students.json'), 
-                  os.path.join(data_directory, 'instructors.json'), 
-                  os.path.join(data_directory, 'courses.json')]
+    # File names relative to the data directory
+    file_names = ['students.json', 'instructors.json', 'courses.json']
 
     for file_name in file_names:
-        if not os.path.exists(file_name):
-            # Create an empty JSON file with an empty dictionary
-            with open(file_name, 'w') as file:
-                json.dump({}, file)
+        # Create an empty data file, in the store's format, unless one exists in any layout
+        _store.create(file_name)
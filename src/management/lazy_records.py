@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from management.school_entities import Student, Instructor, Course
+
+# -------------------------------------------
+# Lazily decoded records
+# -------------------------------------------
+#
+# A LazyRecord stands in for a Student, Instructor or Course read from a data
+# file. It starts out with what the caller already has: the stored dictionary, or
+# the undecoded JSON bytes of a snapshot plus the name kept next to them. The
+# bytes are decoded the first time a field other than the ID or name is read,
+# and an entity object is only built when it is asked for or one of its methods
+# is used.
+
+# Entity class of each record type, and how to build it from a record
+def _student(entry_id, record):
+    return Student(record['name'], record['age'], record['email'], entry_id,
+                   list(record.get('registered_courses', [])))
+
+def _instructor(entry_id, record):
+    return Instructor(record['name'], record['age'], record['email'], entry_id,
+                      list(record.get('assigned_courses', [])))
+
+def _course(entry_id, record):
+    return Course(entry_id, record['name'], record.get('instructor', "TBA"), list(record.get('students', [])))
+
+ENTITY_BUILDERS = {
+    'student': _student,
+    'instructor': _instructor,
+    'course': _course,
+}
+
+
+class LazyRecord:
+    """
+    Proxy for one stored record that decodes and builds as little as possible.
+
+    ``id`` and ``name`` are answered without decoding anything when the name is
+    known up front. Other fields (``record.age``, ``record.registered_courses``)
+    decode the record once and read it; lists are returned as copies, so the
+    stored record cannot be changed through the proxy. Anything else, such as
+    ``register_course()``, is forwarded to the entity built by ``entity()``.
+
+    Parameters:
+        entry_id (str): The ID the record is stored under.
+        record (dict): The stored record, if it is already decoded.
+        raw (bytes): The record as JSON, decoded on first use instead.
+        label (str): The record's name, if known without decoding it.
+    """
+
+    __slots__ = ('id', '_record', '_raw', '_label', '_entity')
+
+    def __init__(self, entry_id, record=None, raw=None, label=None):
+        if record is None and raw is None:
+            raise ValueError("Either a record or its raw bytes are needed")
+        self.id = entry_id
+        self._record = record
+        self._raw = raw
+        self._label = label
+        self._entity = None
+
+    @property
+    def record(self):
+        # The stored dictionary, decoded on first use
+        if self._record is None:
+            self._record = json.loads(self._raw)
+            self._raw = None
+        return self._record
+
+    @property
+    def name(self):
+        if self._label is not None:
+            return self._label
+        return self.record.get('name')
+
+    @property
+    def is_decoded(self):
+        return self._record is not None
+
+    def entity(self):
+        """
+        Builds the Student, Instructor or Course the record describes, once.
+        """
+        if self._entity is None:
+            record_type = self.record.get('type')
+            if record_type not in ENTITY_BUILDERS:
+                raise ValueError(f"Unknown record type '{record_type}' for ID {self.id}")
+            self._entity = ENTITY_BUILDERS[record_type](self.id, self.record)
+        return self._entity
+
+    def __getattr__(self, attribute):
+        # Only called for attributes that are not slots or properties
+        if attribute.startswith('_'):
+            raise AttributeError(attribute)
+        if self._entity is None and attribute in self.record:
+            value = self.record[attribute]
+            return list(value) if isinstance(value, list) else value
+        return getattr(self.entity(), attribute)
+
+    def __repr__(self):
+        return f"LazyRecord({self.id!r}, name={self.name!r})"
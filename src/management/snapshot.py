@@ -0,0 +1,202 @@
+import json
+import mmap
+import struct
+
+# -------------------------------------------
+# Memory-mapped read-only snapshots
+# -------------------------------------------
+#
+# Layout (all integers little-endian):
+#
+#   header    magic 'SMSS', version (u16), flags (u16), record count (u64),
+#             offset of the key blob (u64), offset of the index (u64),
+#             signature of the data the snapshot was built from (8 bytes)
+#   records   compact JSON of every record, back to back
+#   keys      for each record: its UTF-8 ID immediately followed by its label
+#   index     one fixed-size entry per record, sorted by ID bytes: key offset
+#             (u64), ID length (u32), label length (u32), record offset (u64),
+#             record length (u32)
+#
+# Opening a snapshot only reads the header. IDs are found by a binary search
+# over the index, and a record is decoded only when it is asked for. Labels
+# (the names shown in listboxes) are kept next to the IDs, so listing them does
+# not decode any record.
+
+MAGIC = b'SMSS'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sHHQQQ8s')
+_ENTRY = struct.Struct('<QIIQI')
+
+
+def write_snapshot(binary_file, records, signature=b'\0' * 8, label_field='name'):
+    """
+    Writes a snapshot of records to a binary file opened for writing.
+
+    Parameters:
+        binary_file (file): Binary file positioned at its start.
+        records (iterable): ``(id, record)`` pairs; they are consumed one at a time.
+        signature (bytes): 8 bytes identifying the data the records came from.
+        label_field (str): Record field stored next to each ID as its label.
+
+    Returns:
+        int: The number of records written.
+    """
+    binary_file.write(_HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0, signature))
+    entries = []
+    offset = _HEADER.size
+    for entry_id, record in records:
+        encoded = json.dumps(record, separators=(',', ':')).encode('utf-8')
+        binary_file.write(encoded)
+        label = str(record.get(label_field, ''))
+        entries.append((entry_id.encode('utf-8'), label.encode('utf-8'), offset, len(encoded)))
+        offset += len(encoded)
+    entries.sort()
+
+    keys_offset = offset
+    index = []
+    for key, label, record_offset, record_length in entries:
+        binary_file.write(key)
+        binary_file.write(label)
+        index.append(_ENTRY.pack(offset, len(key), len(label), record_offset, record_length))
+        offset += len(key) + len(label)
+    binary_file.write(b''.join(index))
+
+    binary_file.seek(0)
+    binary_file.write(_HEADER.pack(MAGIC, VERSION, 0, len(entries), keys_offset, offset, signature))
+    binary_file.seek(0, 2)
+    return len(entries)
+
+
+def read_signature(path):
+    """
+    Returns the signature stored in a snapshot's header, or None if it is unreadable.
+    """
+    try:
+        with open(path, 'rb') as binary_file:
+            header = binary_file.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(header) < _HEADER.size:
+        return None
+    magic, version, _, _, _, _, signature = _HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return signature
+
+
+class SnapshotReader:
+    """
+    Read-only view of a snapshot file, mapped into memory.
+
+    Mappings of the same file by several processes share the operating system's
+    page cache, and only the pages that are actually touched are read.
+
+    Parameters:
+        path (str): Path of the snapshot file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as binary_file:
+            self._map = mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, _, index_offset, signature = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"'{path}' is not a snapshot file")
+        if version != VERSION:
+            self._map.close()
+            raise ValueError(f"Unsupported snapshot version {version}")
+        self._count = count
+        self._index_offset = index_offset
+        self.signature = signature
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def _entry(self, position):
+        return _ENTRY.unpack_from(self._map, self._index_offset + position * _ENTRY.size)
+
+    def _key(self, position):
+        key_offset, key_length, _, _, _ = self._entry(position)
+        return self._map[key_offset:key_offset + key_length]
+
+    def _find(self, entry_id):
+        # Binary search over the sorted index
+        key = entry_id.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._key(low) == key:
+            return low
+        return -1
+
+    def _decode(self, entry):
+        _, _, _, record_offset, record_length = entry
+        return json.loads(self._map[record_offset:record_offset + record_length])
+
+    def __contains__(self, entry_id):
+        return self._find(entry_id) >= 0
+
+    def get(self, entry_id, default=None):
+        """
+        Decodes and returns the record stored under an ID.
+        """
+        position = self._find(entry_id)
+        if position < 0:
+            return default
+        return self._decode(self._entry(position))
+
+    def raw(self, entry_id):
+        """
+        Returns the undecoded JSON bytes of the record stored under an ID, or None.
+        """
+        position = self._find(entry_id)
+        if position < 0:
+            return None
+        _, _, _, record_offset, record_length = self._entry(position)
+        return self._map[record_offset:record_offset + record_length]
+
+    def labels(self):
+        """
+        Yields ``(id, label)`` pairs in ID order without decoding any record.
+        """
+        for position in range(self._count):
+            key_offset, key_length, label_length, _, _ = self._entry(position)
+            key_end = key_offset + key_length
+            yield (self._map[key_offset:key_end].decode('utf-8'),
+                   self._map[key_end:key_end + label_length].decode('utf-8'))
+
+    def items(self):
+        """
+        Yields ``(id, record)`` pairs in ID order, decoding one record at a time.
+        """
+        for position in range(self._count):
+            entry = self._entry(position)
+            key_offset, key_length = entry[0], entry[1]
+            yield self._map[key_offset:key_offset + key_length].decode('utf-8'), self._decode(entry)
+
+    def raw_items(self):
+        """
+        Yields ``(id, label, raw)`` triples in ID order, where ``raw`` is the record's
+        undecoded JSON bytes.
+        """
+        for position in range(self._count):
+            key_offset, key_length, label_length, record_offset, record_length = self._entry(position)
+            key_end = key_offset + key_length
+            yield (self._map[key_offset:key_end].decode('utf-8'),
+                   self._map[key_end:key_end + label_length].decode('utf-8'),
+                   self._map[record_offset:record_offset + record_length])
@@ -0,0 +1,176 @@
+import re
+from collections import namedtuple
+from itertools import islice
+from operator import attrgetter
+
+# -------------------------------------------
+# Record validation
+# -------------------------------------------
+
+# Compiled once, instead of on every call through re.match
+EMAIL_PATTERN = re.compile(r'^\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+# One problem found in a batch: position of the record in the batch, its ID,
+# the field at fault (None for the record as a whole) and a readable message
+RecordError = namedtuple('RecordError', ['index', 'id', 'field', 'message'])
+
+
+def is_valid_email(email: str):
+    return EMAIL_PATTERN.match(email) is not None
+
+def is_valid_age(age: int):
+    return age >= 0
+
+
+# Field rules work on a whole column of values at once and return the positions
+# of the values that fail, which keeps the per-record cost to a few bytecodes
+_match_email = EMAIL_PATTERN.match
+
+def _bad_text(values):
+    return [i for i, value in enumerate(values) if type(value) is not str or not value or value.isspace()]
+
+def _bad_email(values):
+    return [i for i, value in enumerate(values) if type(value) is not str or _match_email(value) is None]
+
+def _not_int(values):
+    return [i for i, value in enumerate(values) if type(value) is not int]
+
+def _negative(values):
+    # Values that are not integers are reported by _not_int instead
+    return [i for i, value in enumerate(values) if type(value) is int and value < 0]
+
+def _bad_text_list(values):
+    return [i for i, value in enumerate(values)
+            if type(value) is not list or (value and not all(type(item) is str for item in value))]
+
+def _bad_optional_text(values):
+    return [i for i, value in enumerate(values) if value is not None and type(value) is not str]
+
+
+_PERSON_RULES = (
+    ('id', _bad_text, "ID must not be empty"),
+    ('name', _bad_text, "Name must not be empty"),
+    ('email', _bad_email, "Invalid email address"),
+    ('age', _not_int, "Age must be an integer"),
+    ('age', _negative, "Age must be non-negative"),
+)
+
+# Rules for each entity class name: (attribute, rule, message), plus the ID
+# namespace shared by the type and whether its email must be unique. Classes are
+# matched by name, as the GUIs import school_entities under two module paths.
+RULES = {
+    'Student': (
+        _PERSON_RULES + (('registered_courses', _bad_text_list, "Registered courses must be a list of IDs"),),
+        'people', True),
+    'Instructor': (
+        _PERSON_RULES + (('assigned_courses', _bad_text_list, "Assigned courses must be a list of IDs"),),
+        'people', True),
+    'Course': (
+        (('id', _bad_text, "ID must not be empty"),
+         ('name', _bad_text, "Name must not be empty"),
+         ('instructor', _bad_optional_text, "Instructor must be an ID"),
+         ('students', _bad_text_list, "Students must be a list of IDs")),
+        'courses', False),
+}
+
+# Records are checked in chunks of this size, so errors stream out of big batches
+_CHUNK_SIZE = 4096
+
+_rules_cache = {}
+
+
+def _rules_of(record_type):
+    # Subclasses are checked like the nearest entity class they derive from
+    if record_type not in _rules_cache:
+        _rules_cache[record_type] = next((RULES[cls.__name__] for cls in record_type.__mro__
+                                          if cls.__name__ in RULES), None)
+    return _rules_cache[record_type]
+
+
+def _column(records, field):
+    try:
+        return list(map(attrgetter(field), records))
+    except AttributeError:
+        return [getattr(record, field, None) for record in records]
+
+
+def _check_chunk(chunk, seen_ids, seen_emails):
+    # Returns the problems of one chunk as (position, order, field, message), unsorted
+    types = list(map(type, chunk))
+    for record_type in set(types):
+        _rules_of(record_type)
+    kinds = list(map(_rules_cache.__getitem__, types))
+    ids = _column(chunk, 'id')
+    problems = []
+
+    # Field rules, one column at a time for each kind of record in the chunk
+    groups = {}
+    for position, rules in enumerate(kinds):
+        groups.setdefault(id(rules), (rules, []))[1].append(position)
+    for rules, positions in groups.values():
+        if rules is None:
+            problems.extend((position, 0, None, "Object must be an instance of Student, Instructor, or Course.")
+                            for position in positions)
+            continue
+        members = chunk if len(positions) == len(chunk) else [chunk[position] for position in positions]
+        for order, (field, bad_positions, message) in enumerate(rules[0]):
+            values = ids if field == 'id' and members is chunk else _column(members, field)
+            problems.extend((positions[i], order, field, message) for i in bad_positions(values))
+
+    # Cross-record checks, in batch order: the first use of an ID or email wins
+    for position, rules in enumerate(kinds):
+        if rules is None:
+            continue
+        record_id = ids[position]
+        seen = seen_ids[rules[1]]
+        if record_id in seen:
+            problems.append((position, len(rules[0]), 'id', f"Duplicate ID {record_id} in batch"))
+        elif type(record_id) is str:
+            seen.add(record_id)
+        if rules[2]:
+            email = getattr(chunk[position], 'email', None)
+            if type(email) is str:
+                key = email.strip().lower()
+                if key in seen_emails:
+                    problems.append((position, len(rules[0]) + 1, 'email', f"Duplicate email {email} in batch"))
+                else:
+                    seen_emails.add(key)
+    return problems, ids
+
+
+def validate_records(records):
+    """
+    Checks a batch of Students, Instructors and Courses, yielding each problem found.
+
+    Every record is checked against the rules of its type, and against the records
+    before it in the batch: an ID may only appear once per namespace (students and
+    instructors share one) and an email only once among students and instructors.
+    Records are read in chunks, so errors stream out while the batch is consumed.
+
+    Parameters:
+        records (iterable): Student, Instructor and Course objects.
+
+    Yields:
+        RecordError: ``(index, id, field, message)`` for every problem, in batch order.
+    """
+    seen_ids = {'people': set(), 'courses': set()}
+    seen_emails = set()
+    records = iter(records)
+    start = 0
+    while True:
+        chunk = list(islice(records, _CHUNK_SIZE))
+        if not chunk:
+            return
+        problems, ids = _check_chunk(chunk, seen_ids, seen_emails)
+        problems.sort(key=lambda problem: problem[:2])
+        for position, _, field, message in problems:
+            yield RecordError(start + position, ids[position], field, message)
+        start += len(chunk)
+
+
+def check_record(record):
+    """
+    Validates a single record, raising ValueError with the first problem found.
+    """
+    for error in validate_records([record]):
+        raise ValueError(error.message)
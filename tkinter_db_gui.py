@@ -1,7 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
-from src.database.database import create_student, read_students, update_student, delete_student, create_instructor, read_instructors, update_instructor, delete_instructor, create_course, read_course, update_course, delete_course, get_student_courses, get_instructor_courses, get_course_students, register_student_to_course, connect_db, get_student_courses, get_instructor_courses, get_course_students, register_student_to_course
+from src.database.database import create_student, read_students, update_student, delete_student, create_instructor, read_instructors, update_instructor, delete_instructor, create_course, read_course, update_course, delete_course, get_student_courses, get_instructor_courses, get_course_students, register_student_to_course, id_in_use, load_snapshot, get_student, get_instructor, get_course, search, get_student_courses, get_instructor_courses, get_course_students, register_student_to_course
 from src.management.school_entities import Student, Instructor, Course
 
 # -------------------------------------------
@@ -13,33 +13,8 @@ def load_data():
     Load student, instructor, and course data from the database.
     """
     global students, instructors, courses
-    students = {}
-    instructors = {}
-    courses = {}
-
-    # Load students
-    student_records = read_students()
-    for id, name, age, email in student_records:
-        students[id] = {'name': name, 'age': age, 'email': email}
-        # Get registered courses for student
-        registered_courses = get_student_courses(id)
-        students[id]['registered_courses'] = registered_courses
-
-    # Load instructors
-    instructor_records = read_instructors()
-    for id, name, age, email in instructor_records:
-        instructors[id] = {'name': name, 'age': age, 'email': email}
-        # Get assigned courses for instructor
-        assigned_courses = get_instructor_courses(id)
-        instructors[id]['assigned_courses'] = assigned_courses
-
-    # Load courses
-    course_records = read_course()
-    for id, name, instructor_id in course_records:
-        courses[id] = {'name': name, 'instructor_id': instructor_id}
-        # Get students enrolled in course
-        enrolled_students = get_course_students(id)
-        courses[id]['students'] = enrolled_students
+    # A fixed number of queries, instead of one per student, instructor and course
+    students, instructors, courses = load_snapshot()
 
 def populate_listboxes():
     """
@@ -109,6 +84,10 @@ def add_student():
         message_label.config(text="Error: All fields must be filled out.", fg="red")
         return
 
+    if id_in_use('people', student_id):
+        message_label.config(text="Error: Student ID already exists.", fg="red")
+        return
+
     student = Student(id=student_id, name=name, age=int(age), email=email)
 
     try:
@@ -118,6 +97,8 @@ def add_student():
         clear_student_entries()
     except sqlite3.IntegrityError:
         message_label.config(text="Error: Student ID already exists.", fg="red")
+    except ValueError as e:
+        message_label.config(text=f"Error: {e}", fg="red")
 
 def delete_student_gui():
     selected = student_listbox.curselection()
@@ -170,7 +151,11 @@ def save_student_changes(student_id):
         return
 
     student = Student(id=student_id, name=name, age=int(age), email=email)
-    update_student(student)
+    try:
+        update_student(student)
+    except ValueError as e:
+        message_label.config(text=f"Error: {e}", fg="red")
+        return
     load_data()
     populate_listboxes()
     clear_student_entries()
@@ -257,6 +242,10 @@ def add_instructor():
         message_label.config(text="Error: All fields must be filled out.", fg="red")
         return
 
+    if id_in_use('people', instructor_id):
+        message_label.config(text="Error: Instructor ID already exists.", fg="red")
+        return
+
     instructor = Instructor(id=instructor_id, name=name, age=int(age), email=email)
 
     try:
@@ -266,6 +255,8 @@ def add_instructor():
         clear_instructor_entries()
     except sqlite3.IntegrityError:
         message_label.config(text="Error: Instructor ID already exists.", fg="red")
+    except ValueError as e:
+        message_label.config(text=f"Error: {e}", fg="red")
 
 def delete_instructor_gui():
     selected = instructor_listbox.curselection()
@@ -318,7 +309,11 @@ def save_instructor_changes(instructor_id):
         return
 
     instructor = Instructor(id=instructor_id, name=name, age=int(age), email=email)
-    update_instructor(instructor)
+    try:
+        update_instructor(instructor)
+    except ValueError as e:
+        message_label.config(text=f"Error: {e}", fg="red")
+        return
     load_data()
     populate_listboxes()
     clear_instructor_entries()
@@ -371,6 +366,10 @@ def add_course():
         message_label.config(text="Error: Instructor ID not found.", fg="red")
         return
 
+    if id_in_use('courses', course_id):
+        message_label.config(text="Error: Course ID already exists.", fg="red")
+        return
+
     course = Course(id=course_id, name=name, instructor_id=instructor_id)
 
     try:
@@ -380,6 +379,8 @@ def add_course():
         clear_course_entries()
     except sqlite3.IntegrityError:
         message_label.config(text="Error: Course ID already exists.", fg="red")
+    except ValueError as e:
+        message_label.config(text=f"Error: {e}", fg="red")
 
 def delete_course_gui():
     selected = course_listbox.curselection()
@@ -504,6 +505,16 @@ def clear_search_entries():
     instructor_search_entry.delete(0, tk.END)
     courses_search_entry.delete(0, tk.END)
 
+def show_search_matches(type, search_term):
+    # No record has this ID; list those whose ID, name or email match it instead
+    matches = search(search_term, kinds=[type])
+    for match in matches:
+        result_listbox.insert(tk.END, f"{match.name} (ID: {match.id})")
+    if matches:
+        message_label.config(text=f"{len(matches)} {type}(s) matching '{search_term}'.", fg="green")
+    else:
+        message_label.config(text=f"No matching {type} found.", fg="orange")
+
 def perform_search(type):
     search_term = ''
     if type == 'student':
@@ -514,18 +525,14 @@ def perform_search(type):
         search_term = courses_search_entry.get().strip()
 
     if not search_term:
-        message_label.config(text="Please enter an ID.", fg="red")
+        message_label.config(text="Please enter an ID, a name or an email.", fg="red")
         return
 
     result_listbox.delete(0, tk.END)
     clear_search_entries()
 
     if type == 'student':
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM Students WHERE id = ?', (search_term,))
-        student = cursor.fetchone()
-        conn.close()
+        student = get_student(search_term)
         if student:
             id, name, age, email = student
             registered_courses = get_student_courses(id)
@@ -536,13 +543,9 @@ def perform_search(type):
             result_listbox.insert(tk.END, f"Registered Courses: {', '.join(registered_courses) if registered_courses else 'None'}")
             message_label.config(text=f"Matching {type} found.", fg="green")
         else:
-            message_label.config(text=f"No matching {type} found.", fg="orange")
+            show_search_matches(type, search_term)
     elif type == 'instructor':
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM Instructors WHERE id = ?', (search_term,))
-        instructor = cursor.fetchone()
-        conn.close()
+        instructor = get_instructor(search_term)
         if instructor:
             id, name, age, email = instructor
             assigned_courses = get_instructor_courses(id)
@@ -553,13 +556,9 @@ def perform_search(type):
             result_listbox.insert(tk.END, f"Assigned Courses: {', '.join(assigned_courses) if assigned_courses else 'None'}")
             message_label.config(text=f"Matching {type} found.", fg="green")
         else:
-            message_label.config(text=f"No matching {type} found.", fg="orange")
+            show_search_matches(type, search_term)
     elif type == 'course':
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM Courses WHERE id = ?', (search_term,))
-        course = cursor.fetchone()
-        conn.close()
+        course = get_course(search_term)
         if course:
             id, name, instructor_id = course
             enrolled_students = get_course_students(id)
@@ -569,15 +568,15 @@ def perform_search(type):
             result_listbox.insert(tk.END, f"Students: {', '.join(enrolled_students) if enrolled_students else 'None'}")
             message_label.config(text=f"Matching {type} found.", fg="green")
         else:
-            message_label.config(text=f"No matching {type} found.", fg="orange")
+            show_search_matches(type, search_term)
 
 # GUI Layout for Search Tab
 tk.Label(search_frame, text="Search Students").grid(row=0, column=0, columnspan=2, pady=10)
-tk.Label(search_frame, text="Search by ID:").grid(row=1, column=0)
+tk.Label(search_frame, text="Search by ID, name or email:").grid(row=1, column=0)
 tk.Label(search_frame, text="Search Instructors").grid(row=3, column=0, columnspan=2, pady=10)
-tk.Label(search_frame, text="Search by ID:").grid(row=4, column=0)
+tk.Label(search_frame, text="Search by ID, name or email:").grid(row=4, column=0)
 tk.Label(search_frame, text="Search Courses").grid(row=6, column=0, columnspan=2, pady=10)
-tk.Label(search_frame, text="Search by ID:").grid(row=7, column=0)
+tk.Label(search_frame, text="Search by ID or name:").grid(row=7, column=0)
 
 student_search_entry = tk.Entry(search_frame)
 student_search_entry.grid(row=1, column=1)
@@ -11,26 +11,12 @@ from src.management.json_manager import *
 # Create files to store data
 create_json_files()
 
-def load_data():
-    """
-    Load student, instructor, and course data from JSON files.
-
-    :raises FileNotFoundError: If any of the JSON files do not exist.
-    :raises ValueError: If the JSON data is invalid.
-    :return: None
-    :rtype: None
-    """
-    global students, instructors, courses
-    students = load_data_from_json('students.json')
-    instructors = load_data_from_json('instructors.json')
-    courses = load_data_from_json('courses.json')
-
-
 def populate_listboxes():
     """
     Populate listboxes with students, instructors, and courses.
 
-    Clears existing entries and populates them with data from the loaded dictionaries.
+    Clears existing entries and fills them with the names from the JSON files'
+    snapshots, without decoding the records themselves.
 
     :raises KeyError: If required keys are missing in the loaded data.
     :return: None
@@ -38,28 +24,24 @@ def populate_listboxes():
     """
     # Populate students listbox
     student_listbox.delete(0, tk.END)
-    load_data()
-    for id, student_details in students.items():
-        student_listbox.insert(tk.END, f"{student_details['name']} (ID: {id})")
+    for student in iter_entities('students.json'):
+        student_listbox.insert(tk.END, f"{student.name} (ID: {student.id})")
 
     # Populate instructors listbox
     instructor_listbox.delete(0, tk.END)
-    for id, instructor_details in instructors.items():
-        instructor_listbox.insert(tk.END, f"{instructor_details['name']} (ID: {id})")
+    for instructor in iter_entities('instructors.json'):
+        instructor_listbox.insert(tk.END, f"{instructor.name} (ID: {instructor.id})")
 
     # Populate courses listbox
     course_listbox.delete(0, tk.END)
-    for id, course_details in courses.items():
-        course_listbox.insert(tk.END, f"{course_details['name']} (ID: {id})")
+    for course in iter_entities('courses.json'):
+        course_listbox.insert(tk.END, f"{course.name} (ID: {course.id})")
 
 # Tkinter GUI Setup
 root = tk.Tk()
 root.title("School Management System")
 root.geometry("800x600")
 
-# Load initial data
-load_data()
-
 # Create Notebook (tabs)
 notebook = ttk.Notebook(root)
 notebook.grid(row=0, column=0, padx=5, pady=5, sticky='nsew')
@@ -144,29 +126,32 @@ def register_course():
     student_id = student_register_id_entry.get()
     course_id = course_combobox.get()
 
-    students_data = load_data_from_json('students.json')
-    courses_data = load_data_from_json('courses.json')
-
-    if student_id not in students_data:
-        message_label.showerror("Error", "Student ID not found.")
-        return
-    if course_id not in courses_data:
-        message_label.showerror("Error", "Course not found.")
+    # Other stations cannot save either file between these reads and the saves
+    try:
+        with transaction('students.json', 'courses.json'):
+            student_record = get_entity('students.json', student_id)
+            course_record = get_entity('courses.json', course_id)
+
+            if student_record is None:
+                message_label.showerror("Error", "Student ID not found.")
+                return
+            if course_record is None:
+                message_label.showerror("Error", "Course not found.")
+                return
+
+            # Built with their stored course and student lists
+            student = student_record.entity()
+            course = course_record.entity()
+
+            student.register_course(course_id)
+            course.add_student(student_id)
+
+            save_data_to_json(student, 'students.json')
+            save_data_to_json(course, 'courses.json')
+    except LockTimeoutError:
+        message_label.config(text="Error: The records are busy at another station. Please try again.", fg="red")
         return
 
-    student = Student(name=students_data[student_id]['name'],
-                      age=students_data[student_id]['age'],
-                      email=students_data[student_id]["email"], id=student_id)
-    course = Course(name=courses_data[course_id]['name'], id=course_id,
-                    instructor=courses_data[course_id]['instructor'],
-                    students=courses_data[course_id]['students'])
-
-    student.register_course(course_id)
-    course.add_student(student_id)
-
-    save_data_to_json(student, 'students.json')
-    save_data_to_json(course, 'courses.json')
-
     message_label.config(text=f"Student {student_id} registered for course {course_id} successfully!", fg="green")
 
 
@@ -189,7 +174,6 @@ def delete_student():
 
     if delete_from_json(student_id, 'students.json'):
         populate_listboxes()
-        load_data()
         message_label.config(text=f"Student {student_id} deleted successfully!", fg="green")
     else:
         message_label.config(text="Error: Student ID not found in the records.", fg="red")
@@ -211,8 +195,7 @@ def edit_student():
         return
 
     student_id = student_listbox.get(selected).split(" (ID: ")[-1][:-1]
-    students_data = load_data_from_json('students.json')
-    student_details = students_data[student_id]
+    student_details = get_record('students.json', student_id)
 
     student_name_entry.delete(0, tk.END)
     student_name_entry.insert(tk.END, student_details['name'])
@@ -253,7 +236,6 @@ def save_student_changes(student_id):
 
     student = Student(name=name, age=int(age), email=email, id=student_id)
     save_data_to_json(student, 'students.json')
-    load_data()
     populate_listboxes()
     clear_student_entries()
     message_label.config(text=f"Student {student_id} updated successfully!", fg="green")
@@ -296,8 +278,7 @@ student_register_id_entry.grid(row=8, column=0, padx=5, pady=5)
 tk.Label(students_frame, text="Select Course").grid(row=7, column=1, padx=5, pady=5)
 
 # Create a dropdown (combobox) to list available courses for registration.
-courses_data = load_data_from_json('courses.json')
-course_combobox = ttk.Combobox(students_frame, values=list(courses_data.keys()))
+course_combobox = ttk.Combobox(students_frame, values=[course_id for course_id, _ in iter_labels('courses.json')])
 course_combobox.grid(row=8, column=1, padx=5, pady=5)
 
 # Add a button to register the selected course for the student.
@@ -376,7 +357,6 @@ def delete_instructor():
 
     if delete_from_json(instructor_id, 'instructors.json'):
         populate_listboxes()
-        load_data()
         message_label.config(text=f"Instructor {instructor_id} deleted successfully!", fg="green")
     else:
         message_label.config(text="Error: Instructor ID not found in the records.", fg="red")
@@ -398,8 +378,7 @@ def edit_instructor():
         return
 
     instructor_id = instructor_listbox.get(selected).split(" (ID: ")[-1][:-1]
-    instructors_data = load_data_from_json('instructors.json')
-    instructor_details = instructors_data[instructor_id]
+    instructor_details = get_record('instructors.json', instructor_id)
 
     instructor_name_entry.delete(0, tk.END)
     instructor_name_entry.insert(tk.END, instructor_details['name'])
@@ -440,7 +419,6 @@ def save_instructor_changes(instructor_id):
 
     instructor = Instructor(name=name, age=int(age), email=email, id=instructor_id)
     save_data_to_json(instructor, 'instructors.json')
-    load_data()
     populate_listboxes()
     clear_instructor_entries()
     message_label.config(text=f"Instructor {instructor_id} updated successfully!", fg="green")
@@ -532,28 +510,32 @@ def assign_instructor():
     course_id = assign_instructor_id_entry.get()
     instructor_id = instructor_combobox.get()
 
-    instructor_data = load_data_from_json('instructors.json')
-    courses_data = load_data_from_json('courses.json')
-
-    if instructor_id not in instructor_data:
-        message_label.showerror("Error", "Instructor not found.")
-        return
-    if course_id not in courses_data:
-        message_label.showerror("Error", "Course ID not found.")
+    # Other stations cannot save either file between these reads and the saves
+    try:
+        with transaction('instructors.json', 'courses.json'):
+            instructor_record = get_entity('instructors.json', instructor_id)
+            course_record = get_entity('courses.json', course_id)
+
+            if instructor_record is None:
+                message_label.showerror("Error", "Instructor not found.")
+                return
+            if course_record is None:
+                message_label.showerror("Error", "Course ID not found.")
+                return
+
+            # Built with their stored course and student lists
+            instructor = instructor_record.entity()
+            course = course_record.entity()
+
+            instructor.assign_course(course_id)
+            course.assign_instructor(instructor_id)
+
+            save_data_to_json(instructor, 'instructors.json')
+            save_data_to_json(course, 'courses.json')
+    except LockTimeoutError:
+        message_label.config(text="Error: The records are busy at another station. Please try again.", fg="red")
         return
 
-    instructor = Instructor(name=instructor_data[instructor_id]['name'],
-                            age=instructor_data[instructor_id]['age'],
-                            email=instructor_data[instructor_id]["email"], id=instructor_id)
-    course = Course(name=courses_data[course_id]['name'], id=course_id,
-                    instructor=courses_data[course_id]['instructor'], students=courses_data[course_id]['students'])
-
-    instructor.assign_course(course_id)
-    course.assign_instructor(instructor_id)
-
-    save_data_to_json(instructor, 'instructors.json')
-    save_data_to_json(course, 'courses.json')
-
     message_label.config(text=f"Instructor {instructor_id} assigned to course {course_id} successfully!", fg="green")
 
 
@@ -576,7 +558,6 @@ def delete_course():
 
     if delete_from_json(course_id, 'courses.json'):
         populate_listboxes()
-        load_data()
         message_label.config(text=f"Course {course_id} deleted successfully!", fg="green")
     else:
         message_label.config(text="Error: Course ID not found in the records.", fg="red")
@@ -598,8 +579,7 @@ def edit_course():
         return
 
     course_id = course_listbox.get(selected).split(" (ID: ")[-1][:-1]
-    courses_data = load_data_from_json('courses.json')
-    course_details = courses_data[course_id]
+    course_details = get_record('courses.json', course_id)
 
     course_name_entry.delete(0, tk.END)
     course_name_entry.insert(tk.END, course_details['name'])
@@ -638,7 +618,6 @@ def save_course_changes(course_id):
     course = Course(name=name, id=course_id, instructor=instructor)
 
     save_data_to_json(course, 'courses.json')
-    load_data()
     populate_listboxes()
     clear_course_entries()
     message_label.config(text=f"Course {course_id} updated successfully!", fg="green")
@@ -670,8 +649,7 @@ assign_instructor_id_entry.grid(row=8, column=0, padx=5, pady=5)
 tk.Label(courses_frame, text="Select Instructor").grid(row=7, column=1, padx=5, pady=5)
 
 # Dropdown for courses
-instructors_data = load_data_from_json('instructors.json')
-instructor_combobox = ttk.Combobox(courses_frame, values=list(instructors_data.keys()))
+instructor_combobox = ttk.Combobox(courses_frame, values=[instructor_id for instructor_id, _ in iter_labels('instructors.json')])
 instructor_combobox.grid(row=8, column=1, padx=5, pady=5)
 
 tk.Button(courses_frame, text="Assign Instructor", command=assign_instructor).grid(row=8, column=2, pady=5)
@@ -701,7 +679,8 @@ def perform_search(type):
     """
     Perform a search based on the provided type.
 
-    Searches for a student, instructor, or course by ID and displays the results.
+    Searches for a student, instructor, or course by ID, then by email and by name,
+    and displays the results.
 
     :param type: The type of entity to search for ('student', 'instructor', or 'course').
     :type type: str
@@ -710,59 +689,65 @@ def perform_search(type):
     :rtype: None
     """
     if student_search_entry.get():
-        search_term = student_search_entry.get().lower()
+        search_term = student_search_entry.get().strip()
     elif instructor_search_entry.get():
-        search_term = instructor_search_entry.get().lower()
+        search_term = instructor_search_entry.get().strip()
     elif courses_search_entry.get():
-        search_term = courses_search_entry.get().lower()
+        search_term = courses_search_entry.get().strip()
     else:
         message_label.config(text="Please enter an ID.", fg="red")
         return
 
     if type == "student":
-        data = load_data_from_json('students.json')
+        filename = 'students.json'
     elif type == "instructor":
-        data = load_data_from_json('instructors.json')
+        filename = 'instructors.json'
     elif type == "course":
-        data = load_data_from_json('courses.json')
+        filename = 'courses.json'
 
     result_listbox.delete(0, tk.END)
     clear_search_entries()
-    match_found = False
-
-    for item_id, info in data.items():
-        if search_term == item_id:
-            match_found = True
-            if type == "student":
-                result_listbox.insert(tk.END, f"Name: {info['name']}")
-                result_listbox.insert(tk.END, f"ID: {item_id}")
-                result_listbox.insert(tk.END, f"Age: {info['age']}")
-                result_listbox.insert(tk.END, f"Email: {info['email']}")
-                result_listbox.insert(tk.END, f"Registered Courses: {', '.join(info['registered_courses']) if info['registered_courses'] else 'None'}")
-            elif type == "instructor":
-                result_listbox.insert(tk.END, f"Name: {info['name']}")
-                result_listbox.insert(tk.END, f"ID: {item_id}")
-                result_listbox.insert(tk.END, f"Age: {info['age']}")
-                result_listbox.insert(tk.END, f"Email: {info['email']}")
-                result_listbox.insert(tk.END, f"Assigned Courses: {', '.join(info['assigned_courses']) if info['assigned_courses'] else 'None'}")
-            elif type == "course":
-                result_listbox.insert(tk.END, f"Course Name: {info['name']}")
-                result_listbox.insert(tk.END, f"ID: {item_id}")
-                result_listbox.insert(tk.END, f"Instructor: {info['instructor']}")
-                result_listbox.insert(tk.END, f"Students: {', '.join(info['students']) if info['students'] else 'None'}")
-
-    if not match_found:
+
+    # Look the term up in the indexes instead of scanning every record
+    if contains_record(filename, search_term):
+        matches = [search_term]
+    elif type != "course" and find_by_email(filename, search_term) is not None:
+        matches = [find_by_email(filename, search_term)]
+    else:
+        matches = find_by_name(filename, search_term)
+
+    for item_id in matches:
+        info = get_entity(filename, item_id)
+        if type == "student":
+            result_listbox.insert(tk.END, f"Name: {info.name}")
+            result_listbox.insert(tk.END, f"ID: {item_id}")
+            result_listbox.insert(tk.END, f"Age: {info.age}")
+            result_listbox.insert(tk.END, f"Email: {info.email}")
+            result_listbox.insert(tk.END, f"Registered Courses: {', '.join(info.registered_courses) or 'None'}")
+        elif type == "instructor":
+            result_listbox.insert(tk.END, f"Name: {info.name}")
+            result_listbox.insert(tk.END, f"ID: {item_id}")
+            result_listbox.insert(tk.END, f"Age: {info.age}")
+            result_listbox.insert(tk.END, f"Email: {info.email}")
+            result_listbox.insert(tk.END, f"Assigned Courses: {', '.join(courses_of_instructor(item_id)) or 'None'}")
+        elif type == "course":
+            result_listbox.insert(tk.END, f"Course Name: {info.name}")
+            result_listbox.insert(tk.END, f"ID: {item_id}")
+            result_listbox.insert(tk.END, f"Instructor: {info.instructor}")
+            result_listbox.insert(tk.END, f"Students: {', '.join(students_in_course(item_id)) or 'None'}")
+
+    if not matches:
         message_label.config(text=f"No matching {type} found.", fg="orange")
     else:
         message_label.config(text=f"Matching {type} found.", fg="green")
 
 # GUI Layout for Search Tab
 tk.Label(search_frame, text="Search Students").grid(row=0, column=0, columnspan=2, pady=10)
-tk.Label(search_frame, text="Search by ID:").grid(row=1, column=0)
+tk.Label(search_frame, text="Search by ID, email or name:").grid(row=1, column=0)
 tk.Label(search_frame, text="Search Instructors").grid(row=3, column=0, columnspan=2, pady=10)
-tk.Label(search_frame, text="Search by ID:").grid(row=4, column=0)
+tk.Label(search_frame, text="Search by ID, email or name:").grid(row=4, column=0)
 tk.Label(search_frame, text="Search Courses").grid(row=6, column=0, columnspan=2, pady=10)
-tk.Label(search_frame, text="Search by ID:").grid(row=7, column=0)
+tk.Label(search_frame, text="Search by ID or name:").grid(row=7, column=0)
 
 student_search_entry = tk.Entry(search_frame)
 student_search_entry.grid(row=1, column=1)